@@ -0,0 +1,201 @@
+"""Benchmark for remove_background.py.
+
+Generates synthetic RGBA images, runs every available implementation and
+execution mode, and writes throughput, peak RSS and per-stage timings as JSON:
+
+    python bench_remove_background.py --sizes 256 1024 4096 --output bench.json
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+import remove_background as rb
+
+IMPLEMENTATIONS = {"reference": rb.key_black_reference}
+if rb.np is not None:
+    IMPLEMENTATIONS["numpy"] = rb.key_black_numpy
+
+MODES = ("single", "batch", "cached", "tiled")
+
+
+def make_image(size, seed=0):
+    """Noise over a black frame: roughly half the pixels fall under the threshold."""
+    if rb.np is None:
+        img = Image.effect_noise((size, size), 64).convert("RGBA")
+        frame = Image.new("RGBA", (size, size), (0, 0, 0, 255))
+        frame.paste(img.crop((size // 4, 0, size * 3 // 4, size)), (size // 4, 0))
+        return frame
+    np = rb.np
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, size=(size, size, 4), dtype=np.uint8)
+    pixels[..., 3] = 255
+    pixels[: size // 2, :, :3] = rng.integers(0, 21, size=(size // 2, size, 3), dtype=np.uint8)
+    return Image.fromarray(pixels, "RGBA")
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * scale / 2**20
+
+
+def _run_single(path, impl):
+    stages = {}
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        data = f.read()
+    img = Image.open(io.BytesIO(data)).convert("RGBA")
+    stages["decode"] = time.perf_counter() - start
+
+    t = time.perf_counter()
+    img = IMPLEMENTATIONS[impl](img)
+    stages["key"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    out = io.BytesIO()
+    img.save(out, "PNG")
+    stages["encode"] = time.perf_counter() - t
+
+    with open(path, "wb") as f:
+        f.write(out.getvalue())
+    return {"files": 1, "stages": stages}
+
+
+def _run_batch(paths, workers, cache_path=None, warm=False):
+    cache = rb.ProcessedCache(cache_path) if cache_path else None
+    if warm:
+        # Populate the manifest first so the timed run measures the cached path
+        rb.process_batch(paths, workers=workers, cache=cache)
+        cache = rb.ProcessedCache(cache_path)
+    start = time.perf_counter()
+    results = rb.process_batch(paths, workers=workers, cache=cache)
+    # Per-file stage times summed over workers (CPU-seconds, not wall time)
+    stages = {}
+    for r in results:
+        for stage, seconds in r["stages"].items():
+            stages[stage] = stages.get(stage, 0.0) + seconds
+    stages["wall"] = time.perf_counter() - start
+    return {
+        "files": len(paths),
+        "processed": sum(1 for r in results if not r["skipped"] and r["error"] is None),
+        "stages": stages,
+    }
+
+
+def _run_tiled(path, max_memory):
+    stages = {}
+    start = time.perf_counter()
+    rb.key_png_tiled(path, path + ".tmp", max_memory=max_memory, stages=stages)
+    os.replace(path + ".tmp", path)
+    stages["wall"] = time.perf_counter() - start
+    return {"files": 1, "stages": stages}
+
+
+def _case(queue, mode, impl, size, workdir, args):
+    """Runs in a fresh process so peak RSS belongs to this case alone."""
+    src = os.path.join(workdir, f"src_{size}.png")
+    paths = []
+    copies = args.batch_files if mode in ("batch", "cached") else 1
+    for i in range(copies):
+        path = os.path.join(workdir, f"{mode}_{impl}_{size}_{i}.png")
+        shutil.copyfile(src, path)
+        paths.append(path)
+
+    # Silence the per-file prints from process_batch
+    sys.stdout = open(os.devnull, "w")
+    start = time.perf_counter()
+    if mode == "single":
+        result = _run_single(paths[0], impl)
+    elif mode == "tiled":
+        result = _run_tiled(paths[0], args.max_memory_mb * 2**20)
+    else:
+        cache_path = os.path.join(workdir, f"cache_{impl}_{size}.json") if mode == "cached" else None
+        result = _run_batch(paths, args.workers, cache_path, warm=mode == "cached")
+    elapsed = time.perf_counter() - start
+    if mode == "cached":
+        elapsed = result["stages"]["wall"]
+
+    megapixels = size * size * result["files"] / 1e6
+    result.update({
+        "mode": mode,
+        "impl": impl,
+        "size": size,
+        "seconds": elapsed,
+        "megapixels": megapixels,
+        "mp_per_s": megapixels / elapsed if elapsed else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    })
+    queue.put(result)
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="bench_rb_")
+    ctx = multiprocessing.get_context("spawn")
+    cases = []
+    try:
+        for size in args.sizes:
+            make_image(size).save(os.path.join(workdir, f"src_{size}.png"), "PNG")
+            for mode in args.modes:
+                # Batch/cached/tiled always go through rb.key_black
+                impls = args.impls if mode == "single" else ["default"]
+                for impl in impls:
+                    if impl == "reference" and size > args.max_reference_size:
+                        continue
+                    queue = ctx.Queue()
+                    proc = ctx.Process(target=_case, args=(queue, mode, impl, size, workdir, args))
+                    proc.start()
+                    result = queue.get()
+                    proc.join()
+                    cases.append(result)
+                    stages = ", ".join(f"{k} {v:.3f}s" for k, v in result["stages"].items() if k != "wall")
+                    print(f"{mode:>7} {impl:>9} {size:>5}px: {result['seconds']:.3f}s, "
+                          f"{result['mp_per_s'] or 0:.1f} MP/s, {result['peak_rss_mb']:.0f} MB RSS ({stages})",
+                          file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": rb.np.__version__ if rb.np is not None else None,
+        "threshold": 20,
+        "cases": cases,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 1024, 2048, 4096, 8192])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--impls", nargs="+", choices=sorted(IMPLEMENTATIONS), default=sorted(IMPLEMENTATIONS))
+    parser.add_argument("--batch-files", type=int, default=8, help="copies per batch/cached case")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-memory-mb", type=int, default=32, help="ceiling for the tiled mode")
+    parser.add_argument("--max-reference-size", type=int, default=2048,
+                        help="skip the pure-Python loop above this size")
+    parser.add_argument("--output", default=None, help="JSON path (default: stdout)")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,4 @@
-import json
-
-# Load the broken workflow
-with open('workflow_broken.json', 'r') as f:
-    data = json.load(f)
+from workflow_patch import API_KEYS, patch_file
 
 # The fix v3: Use $input.all() directly
 new_js_code = """
@@ -33,39 +29,33 @@ for (let i = 0; i < uploadedItems.length; i++) {
 return results;
 """
 
-found = False
-for node in data['nodes']:
-    if node['name'] == 'Collect URLs':
-        node['parameters']['jsCode'] = new_js_code
+new_log_expression = (
+    "={{ JSON.stringify({ "
+    "chat_id: $json.chatId, "
+    "text: `🔍 Слайд ${$json.slideIndex}/${$json.totalSlides}:\\n"
+    "${$json.error ? '❌ ' + $json.errorMsg : '✅ OK'}\\n"
+    "ref: ${$json.debugInfo.refType || 'NONE'}, size: ${$json.debugInfo.base64SizeKB || 0}KB\\n"
+    "mode: ${$json.debugInfo.mode || 'N/A'}\\n"
+    "binaryKeys: ${JSON.stringify($json.debugInfo.fetchedBinaryKeys || [])}`, "
+    "disable_notification: true "
+    "}) }}"
+)
+
+PATCHES = [
+    {'match': {'name': 'Collect URLs'}, 'set': {'parameters.jsCode': new_js_code}},
+    # Verify Log Slide fix
+    {'match': {'name': 'Log Slide'}, 'set': {'parameters.jsonBody': new_log_expression}, 'required': False},
+]
+
+# Clean up fields for API update and save
+result = patch_file('workflow_broken.json', 'workflow_fixed_v3.json', PATCHES, keep_keys=API_KEYS)
+if result['error']:
+    print(f"Error: {result['error']}")
+else:
+    collect, log_slide = result['patches']
+    if collect['nodes']:
         print("Fixed 'Collect URLs' node with $input.all() logic.")
-        found = True
-        break
-
-if not found:
-    print("Error: 'Collect URLs' node not found!")
-
-# Verify Log Slide fix
-for node in data['nodes']:
-    if node['name'] == 'Log Slide':
-        new_expression = (
-            "={{ JSON.stringify({ "
-            "chat_id: $json.chatId, "
-            "text: `🔍 Слайд ${$json.slideIndex}/${$json.totalSlides}:\\n"
-            "${$json.error ? '❌ ' + $json.errorMsg : '✅ OK'}\\n"
-            "ref: ${$json.debugInfo.refType || 'NONE'}, size: ${$json.debugInfo.base64SizeKB || 0}KB\\n"
-            "mode: ${$json.debugInfo.mode || 'N/A'}\\n"
-            "binaryKeys: ${JSON.stringify($json.debugInfo.fetchedBinaryKeys || [])}`, "
-            "disable_notification: true "
-            "}) }}"
-        )
-        node['parameters']['jsonBody'] = new_expression
+    else:
+        print("Error: 'Collect URLs' node not found!")
+    if log_slide['nodes']:
         print("Re-applied 'Log Slide' fix.")
-        break
-
-# Clean up fields for API update
-allowed_keys = ['name', 'nodes', 'connections', 'settings']
-filtered_data = {k: v for k, v in data.items() if k in allowed_keys}
-
-# Save
-with open('workflow_fixed_v3.json', 'w') as f:
-    json.dump(filtered_data, f, indent=2)
@@ -1,28 +1,628 @@
+import argparse
+import glob
+import hashlib
+import io
+import json
 import os
-from PIL import Image
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, features
+
+try:
+    import numpy as np
+except ImportError:  # fall back to the pure-Python loop
+    np = None
+
+
+def key_black_reference(img, threshold=20):
+    """Pure-Python reference: make near-black pixels of an RGBA image transparent."""
+    datas = img.getdata()
+
+    newData = []
+    for item in datas:
+        # Check if pixel is black (or very close to it)
+        if item[0] <= threshold and item[1] <= threshold and item[2] <= threshold:
+            # Make it transparent
+            newData.append((0, 0, 0, 0))
+        else:
+            # Keep original pixel
+            newData.append(item)
+
+    img.putdata(newData)
+    return img
+
+
+def key_black_numpy(img, threshold=20):
+    """Same as key_black_reference, as one masked write over the pixel array."""
+    # Not a view: Pillow's __array_interface__ copies the pixels via tobytes(),
+    # and the array over that bytes object is read-only, hence the copy below
+    pixels = np.asarray(img)
+    mask = (pixels[..., :3] <= threshold).all(axis=-1)
+    if not mask.any():
+        return img
+
+    keyed = pixels.copy()
+    keyed[mask] = 0
+    out = Image.fromarray(keyed, "RGBA")
+    # Keep ancillary metadata (dpi, icc_profile, ...) so the saved PNG matches
+    out.info = dict(img.info)
+    return out
+
+
+def key_black(img, threshold=20):
+    if np is not None:
+        return key_black_numpy(img, threshold)
+    return key_black_reference(img, threshold)
+
+
+def _key_png_bytes(data, threshold=20):
+    img = Image.open(io.BytesIO(data)).convert("RGBA")
+    img = key_black(img, threshold)
+    out = io.BytesIO()
+    img.save(out, "PNG", **_png_save_options(img))
+    return out.getvalue(), img.width * img.height
+
+
+def _to_palette(img):
+    """Lossless RGBA -> P conversion (alpha via tRNS), or None if there are >256 colors."""
+    if np is None:
+        return None
+    # Fully transparent pixels all collapse to one palette entry
+    pixels = np.asarray(img).reshape(-1, 4).copy()
+    pixels[pixels[:, 3] == 0] = 0
+    # Cheap rejection on a sample before the full sort
+    if len(np.unique(pixels[:: max(1, len(pixels) // 65536)].view(np.uint32))) > 256:
+        return None
+    colors, index = np.unique(pixels.view(np.uint32).ravel(), return_inverse=True)
+    if len(colors) > 256:
+        return None
+    colors = colors.view(np.uint8).reshape(-1, 4)
+
+    pal = Image.fromarray(index.astype(np.uint8).reshape(img.height, img.width), "P")
+    pal.putpalette(colors[:, :3].tobytes())
+    if (colors[:, 3] < 255).any():
+        # Binary alpha is the common case after keying: one fully transparent entry
+        pal.info["transparency"] = colors[:, 3].tobytes()
+    for key in ("icc_profile", "dpi"):
+        if key in img.info:
+            pal.info[key] = img.info[key]
+    return pal
+
+
+def encode_png(img, optimize=False, compress_level=9):
+    """PNG bytes; optimize adds palette reduction and a full zlib search."""
+    out = io.BytesIO()
+    options = _png_save_options(img)
+    if not optimize:
+        img.save(out, "PNG", **options)
+        return out.getvalue()
+    pal = _to_palette(img)
+    if pal is not None:
+        pal.save(out, "PNG", optimize=True, **options)
+    else:
+        img.save(out, "PNG", optimize=True, compress_level=compress_level, **options)
+    return out.getvalue()
+
+
+def encode_webp(img):
+    """Lossless WebP bytes, or None when Pillow was built without WebP."""
+    if not features.check("webp"):
+        return None
+    out = io.BytesIO()
+    img.save(out, "WEBP", lossless=True, method=6)
+    return out.getvalue()
+
+
+def _webp_path(image_path):
+    return os.path.splitext(image_path)[0] + ".webp"
+
+
+def _lap(stages, name, since):
+    """Add the time elapsed since `since` to stages[name]; returns the current time."""
+    now = time.perf_counter()
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + now - since
+    return now
+
+
+def _key_and_encode(data, threshold=20, optimize=False, webp=False, stages=None):
+    """Decode once, key, and encode every requested variant.
+
+    Returns (png bytes, webp bytes or None, pixel count, per-variant report).
+    Decode/key/encode seconds are added to stages if given.
+    """
+    t = time.perf_counter()
+    img = Image.open(io.BytesIO(data)).convert("RGBA")
+    t = _lap(stages, "decode", t)
+    img = key_black(img, threshold)
+    t = _lap(stages, "key", t)
+
+    report = {}
+    start = time.perf_counter()
+    png = encode_png(img, optimize)
+    report["png"] = {"bytes": len(png), "seconds": time.perf_counter() - start}
+
+    webp_data = None
+    if webp:
+        start = time.perf_counter()
+        webp_data = encode_webp(img)
+        if webp_data is not None:
+            report["webp"] = {"bytes": len(webp_data), "seconds": time.perf_counter() - start}
+    _lap(stages, "encode", t)
+    return png, webp_data, img.width * img.height, report
+
+
+def _settings_key(threshold, optimize=False):
+    """Cache key suffix; optimized PNGs are different outputs for the same input."""
+    return f"{threshold}+opt" if optimize else str(threshold)
+
+
+# Bytes held per pixel by the whole-image path: decoded RGBA, keyed copy and
+# the encoder's working buffers.
+WHOLE_IMAGE_BYTES_PER_PIXEL = 12
+
+# Bytes per RGBA pixel of a strip in key_png_tiled: inflated scanlines, the
+# strip PNG handed to Pillow, decoded and converted strip, keyed copy and
+# filtered output.
+TILED_BYTES_PER_PIXEL = 48
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# 8-bit colour types whose scanlines Pillow's tobytes() reproduces exactly:
+# colour type -> bytes per pixel
+STREAMABLE_COLOR_TYPES = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def _png_chunk(tag, data):
+    chunk = tag + data
+    return struct.pack(">I", len(data)) + chunk + struct.pack(">I", zlib.crc32(chunk))
+
+
+def _png_save_options(img):
+    """Ancillary data Pillow only writes when asked for: keep the source dpi."""
+    dpi = img.info.get("dpi")
+    return {"dpi": dpi} if dpi else {}
+
+
+def _ancillary_chunks(info):
+    """iCCP and pHYs exactly as Pillow writes them for the whole-image path."""
+    chunks = []
+    icc = info.get("icc_profile")
+    if icc:
+        chunks.append(_png_chunk(b"iCCP", b"ICC Profile\0\0" + zlib.compress(icc)))
+    dpi = info.get("dpi")
+    if dpi:
+        chunks.append(_png_chunk(b"pHYs", struct.pack(
+            ">IIB", int(dpi[0] / 0.0254 + 0.5), int(dpi[1] / 0.0254 + 0.5), 1)))
+    return chunks
+
+
+def _read_png_header(f):
+    """Parse up to the first IDAT.
+
+    Returns (width, height, bit depth, colour type, interlace, PLTE/tRNS chunks,
+    length of the first IDAT), or None if f is not a PNG.
+    """
+    head = f.read(33)
+    if len(head) < 33 or head[:8] != PNG_SIGNATURE or head[12:16] != b"IHDR":
+        return None
+    width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", head[16:29])
+    palette = []
+    while True:
+        length, tag = struct.unpack(">I4s", f.read(8))
+        if tag == b"IDAT":
+            return width, height, depth, color_type, interlace, palette, length
+        data = f.read(length)
+        f.read(4)  # CRC
+        if tag in (b"PLTE", b"tRNS"):
+            palette.append((tag, data))
+
+
+def _inflate_idat(f, length, max_out):
+    """Inflate consecutive IDAT chunks, yielding at most max_out bytes at a time.
+
+    Compressed data is read in 64 KB blocks, so a single huge IDAT chunk or a
+    very compressible image never has to fit in memory at once.
+    """
+    inflater = zlib.decompressobj()
+    while True:
+        while length:
+            block = f.read(min(length, 1 << 16))
+            if not block:
+                raise ValueError("truncated PNG")
+            length -= len(block)
+            out = inflater.decompress(block, max_out)
+            while out:
+                yield out
+                out = inflater.decompress(inflater.unconsumed_tail, max_out)
+        f.read(4)  # CRC
+        length, tag = struct.unpack(">I4s", f.read(8))
+        if tag != b"IDAT":
+            break
+    out = inflater.flush()
+    if out:
+        yield out
+
+
+def _decode_strip(width, color_type, palette, prev_row, scanlines):
+    """Unfilter one strip of scanlines; returns (RGBA strip, its last raw row).
+
+    Pillow decodes a small PNG made of just these rows. The previous strip's
+    last unfiltered row goes first with filter type None, so Up/Average/Paeth
+    rows at the boundary see their real predecessor; it is cropped off after.
+    """
+    stride = 1 + width * STREAMABLE_COLOR_TYPES[color_type]
+    if prev_row is not None:
+        scanlines = b"\x00" + prev_row + scanlines
+    height = len(scanlines) // stride
+    png = b"".join([
+        PNG_SIGNATURE,
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)),
+        *(_png_chunk(tag, data) for tag, data in palette),
+        _png_chunk(b"IDAT", zlib.compress(scanlines, 0)),
+        _png_chunk(b"IEND", b""),
+    ])
+    del scanlines
+    img = Image.open(io.BytesIO(png))
+    img.load()
+    del png
+    last_row = img.crop((0, height - 1, width, height)).tobytes()
+    if prev_row is not None:
+        img = img.crop((0, 1, width, height))
+    return img.convert("RGBA"), last_row
+
+
+def _png_strips(f, header, rows):
+    """RGBA strips of up to rows rows from an 8-bit non-interlaced PNG."""
+    width, _, _, color_type, _, palette, length = header
+    strip_bytes = rows * (1 + width * STREAMABLE_COLOR_TYPES[color_type])
+    pending = bytearray()
+    prev_row = None
+    for piece in _inflate_idat(f, length, strip_bytes):
+        pending += piece
+        while len(pending) >= strip_bytes:
+            strip, prev_row = _decode_strip(width, color_type, palette, prev_row,
+                                            bytes(pending[:strip_bytes]))
+            del pending[:strip_bytes]
+            yield strip
+    if pending:
+        strip, _ = _decode_strip(width, color_type, palette, prev_row, bytes(pending))
+        yield strip
+
+
+def _image_strips(img, rows):
+    """RGBA strips cropped from an already decoded image."""
+    width, height = img.size
+    for top in range(0, height, rows):
+        yield img.crop((0, top, width, min(top + rows, height))).convert("RGBA")
+
+
+def key_png_tiled(src, dst, threshold=20, max_memory=64 * 2**20, compress_level=6, stages=None):
+    """Key an image strip by strip and stream it out as an RGBA PNG.
+
+    src is a path or binary file. 8-bit non-interlaced PNGs (grey, RGB,
+    palette, with or without alpha) are inflated and decoded strip by strip
+    too, so the image data held at once stays within max_memory. Other
+    sources (16-bit or sub-byte PNGs, interlaced PNGs) are decoded whole
+    first, and only conversion, keying and encoding are strip-sized. Pixels,
+    ICC profile and dpi match the whole-image path. The PNG bytes differ,
+    because rows are written with the Up filter. Returns the pixel count;
+    decode/key/encode seconds, summed over strips, are added to stages if given.
+    """
+    t = time.perf_counter()
+    f = open(src, "rb") if isinstance(src, (str, os.PathLike)) else src
+    try:
+        with Image.open(f) as probe:
+            info = dict(probe.info)
+        f.seek(0)
+        header = _read_png_header(f)
+        if header and header[2] == 8 and header[3] in STREAMABLE_COLOR_TYPES and not header[4]:
+            width, height = header[:2]
+            source = None
+        else:
+            f.seek(0)
+            source = Image.open(f)
+            source.load()
+            width, height = source.size
+        row_bytes = width * 4
+        rows = max(1, max_memory // (width * TILED_BYTES_PER_PIXEL))
+        strips = _png_strips(f, header, rows) if source is None else _image_strips(source, rows)
+
+        compressor = zlib.compressobj(compress_level)
+        prev_row = None
+        with open(dst, "wb") as out:
+            out.write(PNG_SIGNATURE)
+            # 8-bit RGBA, no interlace
+            out.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+            for chunk in _ancillary_chunks(info):
+                out.write(chunk)
+            t = _lap(stages, "encode", t)
+            for strip in strips:
+                t = _lap(stages, "decode", t)
+                strip_rows = strip.height
+                raw = key_black(strip, threshold).tobytes()
+                del strip
+                t = _lap(stages, "key", t)
+
+                if np is not None:
+                    pixels = np.frombuffer(raw, dtype=np.uint8).reshape(strip_rows, row_bytes)
+                    above = np.empty_like(pixels)
+                    above[0] = prev_row if prev_row is not None else 0
+                    above[1:] = pixels[:-1]
+                    filtered = np.empty((strip_rows, row_bytes + 1), dtype=np.uint8)
+                    filtered[:, 0] = 2  # Up
+                    np.subtract(pixels, above, out=filtered[:, 1:])
+                    prev_row = pixels[-1].copy()
+                    data = filtered.tobytes()
+                    del pixels, above, filtered
+                else:
+                    data = b"".join(
+                        b"\x00" + raw[i:i + row_bytes] for i in range(0, len(raw), row_bytes)
+                    )
+                del raw
+
+                compressed = compressor.compress(data)
+                del data
+                if compressed:
+                    out.write(_png_chunk(b"IDAT", compressed))
+                t = _lap(stages, "encode", t)
+            out.write(_png_chunk(b"IDAT", compressor.flush()))
+            out.write(_png_chunk(b"IEND", b""))
+            _lap(stages, "encode", t)
+    finally:
+        if f is not src:
+            f.close()
+    return width * height
+
+
+def _pixel_count(src):
+    # Reads only the header
+    with Image.open(src) as img:
+        return img.width * img.height
+
+
+def _is_tiled(image_path, max_memory):
+    """True if the image is too large for the whole-image path under max_memory."""
+    return bool(max_memory) and _pixel_count(image_path) * WHOLE_IMAGE_BYTES_PER_PIXEL > max_memory
+
+
+def _needs_webp(image_path, webp, max_memory):
+    """A .webp variant is expected but missing.
+
+    Images keyed in strips never get one (the WebP encoder needs the whole
+    image), so a missing .webp next to them is not a reason to redo them.
+    """
+    if not webp or os.path.exists(_webp_path(image_path)):
+        return False
+    return not _is_tiled(image_path, max_memory)
+
+
+def _process_file(image_path, threshold=20):
+    with open(image_path, "rb") as f:
+        data = f.read()
+    out, pixels = _key_png_bytes(data, threshold)
+    # Overwrite content
+    with open(image_path, "wb") as f:
+        f.write(out)
+    return pixels
+
 
 def remove_black_background(image_path, threshold=20):
     try:
-        img = Image.open(image_path).convert("RGBA")
-        datas = img.getdata()
-        
-        newData = []
-        for item in datas:
-            # Check if pixel is black (or very close to it)
-            if item[0] <= threshold and item[1] <= threshold and item[2] <= threshold:
-                # Make it transparent
-                newData.append((0, 0, 0, 0))
-            else:
-                # Keep original pixel
-                newData.append(item)
-        
-        img.putdata(newData)
-        # Overwrite content
-        img.save(image_path, "PNG")
+        _process_file(image_path, threshold)
         print(f"Processed: {image_path}")
     except Exception as e:
         print(f"Error processing {image_path}: {e}")
 
+
+CACHE_PATH = ".remove_background_cache.json"
+
+
+class ProcessedCache:
+    """Manifest of processed files, persisted as JSON.
+
+    ``entries`` maps ``"<input sha256>:<settings>"`` (threshold plus encoder
+    options, see _settings_key) to the output sha256. Keying is idempotent, so
+    a file whose hash is a known output for the settings needs no work.
+    ``files`` remembers size/mtime per path so an untouched file is skipped
+    without even being read.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.entries = {}
+        self.files = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.entries = data.get("entries", {})
+                self.files = data.get("files", {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable cache {path}: {e}")
+
+    def done_hashes(self, settings):
+        suffix = f":{settings}"
+        return frozenset(out for key, out in self.entries.items() if key.endswith(suffix))
+
+    def is_fresh(self, image_path, done):
+        """True if the file is unchanged since it was last written as a known output."""
+        record = self.files.get(image_path)
+        if not record or record["sha256"] not in done:
+            return False
+        try:
+            st = os.stat(image_path)
+        except OSError:
+            return False
+        return record["size"] == st.st_size and record["mtime_ns"] == st.st_mtime_ns
+
+    def record(self, image_path, settings, in_sha, out_sha):
+        self.entries[f"{in_sha}:{settings}"] = out_sha
+        self.entries[f"{out_sha}:{settings}"] = out_sha
+        st = os.stat(image_path)
+        self.files[image_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": out_sha}
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "entries": self.entries, "files": self.files}, f, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+# Output hashes already known for the current threshold; set per pool process.
+_done_hashes = frozenset()
+
+
+def _init_worker(done):
+    global _done_hashes
+    _done_hashes = done
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _batch_worker(image_path, threshold, max_memory=None, optimize=False, webp=False):
+    """Runs in a pool process; never raises so one bad file does not stop the batch."""
+    start = time.perf_counter()
+    result = {"path": image_path, "pixels": 0, "skipped": False, "tiled": False, "error": None,
+              "in_sha256": None, "out_sha256": None, "in_bytes": 0, "variants": {}, "stages": {}}
+    stages = result["stages"]
+    try:
+        # Hash and size the file without holding it: the tiled path never reads it whole
+        t = time.perf_counter()
+        in_sha = _sha256_file(image_path)
+        result["in_sha256"] = in_sha
+        result["in_bytes"] = os.path.getsize(image_path)
+        if in_sha in _done_hashes and not _needs_webp(image_path, webp, max_memory):
+            _lap(stages, "read", t)
+            result["skipped"] = True
+            result["out_sha256"] = in_sha
+        elif _is_tiled(image_path, max_memory):
+            _lap(stages, "read", t)
+            tmp = image_path + ".tmp"
+            result["pixels"] = key_png_tiled(image_path, tmp, threshold, max_memory, stages=stages)
+            os.replace(tmp, image_path)
+            result["tiled"] = True
+            result["out_sha256"] = _sha256_file(image_path)
+        else:
+            with open(image_path, "rb") as f:
+                data = f.read()
+            _lap(stages, "read", t)
+            out, webp_data, result["pixels"], result["variants"] = _key_and_encode(
+                data, threshold, optimize, webp, stages)
+            with open(image_path, "wb") as f:
+                f.write(out)
+            if webp_data is not None:
+                with open(_webp_path(image_path), "wb") as f:
+                    f.write(webp_data)
+            result["out_sha256"] = hashlib.sha256(out).hexdigest()
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def collect_images(patterns, extensions=(".png",)):
+    """Expand directories (recursively) and glob patterns into a sorted list of files."""
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*")
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if os.path.isfile(path) and path.lower().endswith(extensions):
+                found.add(os.path.normpath(path))
+    return sorted(found)
+
+
+def process_batch(paths, threshold=20, workers=None, cache=None, max_memory=None,
+                  optimize=False, webp=False):
+    """Key every file in paths across a process pool and print per-file timings.
+
+    With a ProcessedCache, files already processed at these settings are skipped
+    and the manifest is updated and saved at the end. With max_memory (bytes per
+    worker), images too large for the whole-image path are keyed in strips; those
+    are written as plain PNG without a WebP variant. optimize and webp select the
+    output encodings, produced in the same worker from the one decoded image.
+    """
+    global _done_hashes
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    settings = _settings_key(threshold, optimize)
+    done = cache.done_hashes(settings) if cache else frozenset()
+    todo = [
+        path for path in paths
+        if not (cache and cache.is_fresh(path, done) and not _needs_webp(path, webp, max_memory))
+    ]
+    fresh = len(paths) - len(todo)
+
+    results = []
+    if workers == 1 or len(todo) <= 1:
+        _done_hashes = done
+        for path in todo:
+            results.append(_batch_worker(path, threshold, max_memory, optimize, webp))
+            _print_result(results[-1])
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo)),
+                                 initializer=_init_worker, initargs=(done,)) as pool:
+            futures = [pool.submit(_batch_worker, path, threshold, max_memory, optimize, webp) for path in todo]
+            for future in futures:
+                results.append(future.result())
+                _print_result(results[-1])
+
+    if cache:
+        for r in results:
+            if r["error"] is None:
+                cache.record(r["path"], settings, r["in_sha256"], r["out_sha256"])
+        cache.save()
+    elapsed = time.perf_counter() - start
+
+    ok = [r for r in results if r["error"] is None and not r["skipped"]]
+    skipped = fresh + sum(1 for r in results if r["skipped"])
+    failed = sum(1 for r in results if r["error"] is not None)
+    megapixels = sum(r["pixels"] for r in ok) / 1e6
+    in_bytes = sum(r["in_bytes"] for r in ok)
+    if in_bytes:
+        sizes = ", ".join(
+            f"{fmt} {sum(r['variants'][fmt]['bytes'] for r in ok if fmt in r['variants']) / 1024:.0f} KB"
+            for fmt in ("png", "webp") if any(fmt in r["variants"] for r in ok)
+        )
+        if sizes:
+            print(f"Output: {in_bytes / 1024:.0f} KB in -> {sizes}")
+    print(
+        f"Done: {len(ok)} processed, {skipped} cached, {failed} failed; "
+        f"{megapixels:.1f} MP in {elapsed:.2f}s "
+        f"({len(ok) / elapsed if elapsed else 0:.1f} files/s, "
+        f"{megapixels / elapsed if elapsed else 0:.1f} MP/s, {workers} workers)"
+    )
+    return results
+
+
+def _print_result(result):
+    if result["skipped"]:
+        return
+    if result["error"] is None:
+        mode = ", tiled" if result["tiled"] else ""
+        sizes = "".join(
+            f", {fmt} {v['bytes'] / 1024:.1f} KB in {v['seconds'] * 1000:.0f} ms"
+            for fmt, v in result["variants"].items()
+        )
+        print(f"Processed: {result['path']} ({result['seconds'] * 1000:.0f} ms{mode}; "
+              f"{result['in_bytes'] / 1024:.1f} KB in{sizes})")
+    else:
+        print(f"Error processing {result['path']}: {result['error']}")
+
+
 icon_files = [
     "public/premium/icon_shield.png",
     "public/premium/icon_chart.png",
@@ -31,10 +631,35 @@ icon_files = [
     "public/premium/icon_gift.png"
 ]
 
-print("Starting background removal...")
-for icon in icon_files:
-    if os.path.exists(icon):
-        remove_black_background(icon)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Make near-black backgrounds transparent (in place).")
+    parser.add_argument("paths", nargs="*", help="files, directories or glob patterns (default: premium icons)")
+    parser.add_argument("--threshold", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None, help="pool size (default: CPU count)")
+    parser.add_argument("--cache", default=CACHE_PATH, help=f"manifest of processed files (default: {CACHE_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="reprocess every file")
+    parser.add_argument("--max-memory-mb", type=int, default=None,
+                        help="per-worker budget for image data (the interpreter adds ~35 MB); "
+                             "larger images are decoded and keyed in strips")
+    parser.add_argument("--optimize", action="store_true",
+                        help="palette-reduce binary-alpha images and use maximum PNG compression")
+    parser.add_argument("--webp", action="store_true", help="also write a lossless .webp next to each PNG")
+    args = parser.parse_args(argv)
+
+    if not args.paths:
+        for icon in icon_files:
+            if not os.path.exists(icon):
+                print(f"File not found: {icon}")
+        paths = [icon for icon in icon_files if os.path.exists(icon)]
     else:
-        print(f"File not found: {icon}")
-print("Done.")
+        paths = collect_images(args.paths)
+
+    print(f"Starting background removal ({len(paths)} files)...")
+    cache = None if args.no_cache else ProcessedCache(args.cache)
+    max_memory = args.max_memory_mb * 2**20 if args.max_memory_mb else None
+    process_batch(paths, args.threshold, args.workers, cache, max_memory, args.optimize, args.webp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк стратегий обхода участников и выдачи приглашений на FakeTelegramClient.
+
+Для каждого размера канала и стратегии: время, число вызовов API, вызовов на
+найденного участника, покрытие и число FloodWait. Результат — JSON.
+
+    python bench_telegram.py --sizes 1000 10000 --output bench_telegram.json
+    python bench_telegram.py --sizes 200000 --crawl adaptive --invite   # только обход
+
+Адаптивный обход большого канала идёт минутами: клиент ограничен --rate вызовов/с.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from fake_telegram import FakeTelegramClient
+from get_channel_members import ALPHABET, CHANNEL_ID, CHAT_ID, SEARCH_LIMIT, TokenBucket, crawl_members
+from send_invite import bulk_invite, issue_links, send_links
+
+CRAWL_STRATEGIES = ('sequential', 'concurrent', 'adaptive')
+INVITE_STRATEGIES = ('per-user', 'bulk')
+
+
+async def crawl_sequential(client, entity):
+    """Исходный алгоритм: пустой запрос + одиночные символы по очереди, ошибки пропускаются"""
+    users = {}
+    for query in [''] + list(ALPHABET):
+        try:
+            for user in await client.get_participants(entity, search=query, limit=SEARCH_LIMIT):
+                users.setdefault(user.id, user)
+        except Exception:
+            pass
+    return users
+
+
+async def run_crawl(strategy, client, args):
+    entity = await client.get_entity(CHANNEL_ID)
+    limiter = TokenBucket(rate=args.rate, burst=args.burst)
+    if strategy == 'sequential':
+        return await crawl_sequential(client, entity)
+    depth = 1 if strategy == 'concurrent' else args.max_depth
+    users, _ = await crawl_members(client, entity, limiter=limiter, concurrency=args.concurrency,
+                                   target=entity.participants_count, max_depth=depth)
+    return users
+
+
+async def invite_per_user(client, user_ids):
+    """Как send_invite.py USER_ID в цикле: каждый раз своё соединение и резолв сущностей.
+
+    Ошибка (в том числе FloodWait) роняет запуск для этого пользователя, как и в скрипте.
+    """
+    for user_id in user_ids:
+        await client.connect()
+        try:
+            channel = await client.get_entity(CHANNEL_ID)
+            chat = await client.get_entity(CHAT_ID)
+            channel_link, chat_link = await issue_links(client, channel, chat)
+            user = await client.get_entity(user_id)
+            await send_links(client, user, channel_link, chat_link)
+        except Exception:
+            pass
+        await client.disconnect()
+
+
+async def run_invite(strategy, client, user_ids, args):
+    if strategy == 'per-user':
+        await invite_per_user(client, user_ids)
+        return
+    channel = await client.get_entity(CHANNEL_ID)
+    chat = await client.get_entity(CHAT_ID)
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = os.path.join(tmp, 'ledger.jsonl')
+        await bulk_invite(client, channel, chat, user_ids, ledger,
+                          limiter=TokenBucket(rate=args.rate, burst=args.burst))
+
+
+def make_client(size, args):
+    return FakeTelegramClient(channel_size=size, latency=args.latency, rate_limit=args.server_rate,
+                              flood_seconds=args.flood_seconds, connect_latency=args.connect_latency)
+
+
+async def bench(args):
+    cases = []
+    for size in args.sizes:
+        for strategy in args.crawl:
+            client = make_client(size, args)
+            started = time.perf_counter()
+            users = await run_crawl(strategy, client, args)
+            elapsed = time.perf_counter() - started
+            calls = client.call_counts().get('get_participants', 0)
+            cases.append({
+                'kind': 'crawl', 'strategy': strategy, 'members': size,
+                'seconds': elapsed, 'found': len(users), 'coverage': len(users) / size,
+                'calls': calls, 'calls_per_member': calls / len(users) if users else None,
+                'flood_waits': client.flood_waits,
+            })
+            report(cases[-1])
+
+        for strategy in args.invite:
+            client = make_client(size, args)
+            user_ids = [u.id for u in client.groups[CHANNEL_ID].users[:args.invites]]
+            started = time.perf_counter()
+            await run_invite(strategy, client, user_ids, args)
+            elapsed = time.perf_counter() - started
+            cases.append({
+                'kind': 'invite', 'strategy': strategy, 'members': size, 'users': len(user_ids),
+                'seconds': elapsed, 'sent': len(set(client.sent)), 'calls': len(client.calls),
+                'calls_per_user': len(client.calls) / len(user_ids) if user_ids else None,
+                'by_method': client.call_counts(), 'flood_waits': client.flood_waits,
+            })
+            report(cases[-1])
+    return cases
+
+
+def report(case):
+    if case['kind'] == 'crawl':
+        print(f"crawl  {case['strategy']:>10} {case['members']:>7}: {case['seconds']:7.2f}s, "
+              f"{case['calls']:5} calls, покрытие {case['coverage']:.1%}, FloodWait {case['flood_waits']}",
+              file=sys.stderr)
+    else:
+        print(f"invite {case['strategy']:>10} {case['users']:>7}: {case['seconds']:7.2f}s, "
+              f"{case['calls']:5} calls, отправлено {case['sent']}, FloodWait {case['flood_waits']}",
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк обхода участников и приглашений (офлайн)')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--crawl', nargs='*', choices=CRAWL_STRATEGIES, default=list(CRAWL_STRATEGIES))
+    parser.add_argument('--invite', nargs='*', choices=INVITE_STRATEGIES, default=list(INVITE_STRATEGIES))
+    parser.add_argument('--invites', type=int, default=100, help='пользователей в тесте приглашений')
+    parser.add_argument('--latency', type=float, default=0.02, help='задержка вызова, с')
+    parser.add_argument('--connect-latency', type=float, default=0.3,
+                        help='соединение и проверка авторизации, с (запуск скрипта на каждое приглашение)')
+    parser.add_argument('--server-rate', type=float, default=30, help='вызовов/с до FloodWait')
+    parser.add_argument('--flood-seconds', type=int, default=1)
+    parser.add_argument('--rate', type=float, default=20, help='лимит клиента (TokenBucket), вызовов/с')
+    parser.add_argument('--burst', type=int, default=5, help='всплеск TokenBucket')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--max-depth', type=int, default=3)
+    parser.add_argument('--output', default=None, help='JSON (по умолчанию stdout)')
+    args = parser.parse_args(argv)
+
+    cases = asyncio.run(bench(args))
+    result = {'params': vars(args), 'cases': cases}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
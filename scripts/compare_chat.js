@@ -26,20 +26,23 @@ async function compare() {
     return;
   }
 
-  const dbIds = dbUsers.map(u => u.telegram_id);
+  // Set/Map вместо includes/find — сверка за O(n)
+  const dbIds = new Set(dbUsers.map(u => u.telegram_id));
+  const chatIdsSet = new Set(chatIds);
+  const membersById = new Map(chatMembers.map(m => [m.id, m]));
   console.log('В базе:', dbUsers.length);
 
   // В чате, но НЕ в базе
-  const inChatNotInDb = chatIds.filter(id => !dbIds.includes(id));
+  const inChatNotInDb = chatIds.filter(id => !dbIds.has(id));
   console.log('\n=== В ЧАТЕ, но НЕТ в базе (' + inChatNotInDb.length + ') ===');
   inChatNotInDb.forEach(id => {
-    const member = chatMembers.find(m => m.id === id);
+    const member = membersById.get(id);
     console.log('  ID:', id, '| @' + (member.username || 'no_username') + ' |', member.first_name || '');
   });
 
   // В базе с in_chat=true, но НЕТ в чате
   const dbInChat = dbUsers.filter(u => u.in_chat === true);
-  const inDbNotInChat = dbInChat.filter(u => !chatIds.includes(u.telegram_id));
+  const inDbNotInChat = dbInChat.filter(u => !chatIdsSet.has(u.telegram_id));
   console.log('\n=== В базе in_chat=true, но НЕТ в чате (' + inDbNotInChat.length + ') ===');
   inDbNotInChat.slice(0, 30).forEach(u => {
     console.log('  ID:', u.telegram_id, '| @' + (u.username || 'no_username') + ' | expires:', u.expires_at);
@@ -49,7 +52,7 @@ async function compare() {
   // Истёкшие, которые ещё в чате
   const now = new Date().toISOString();
   const expiredInChat = dbUsers.filter(u =>
-    chatIds.includes(u.telegram_id) &&
+    chatIdsSet.has(u.telegram_id) &&
     u.expires_at < now
   );
   console.log('\n=== ИСТЕКЛИ, но ещё В ЧАТЕ (' + expiredInChat.length + ') ===');
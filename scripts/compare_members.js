@@ -26,20 +26,23 @@ async function compare() {
     return;
   }
 
-  const dbIds = dbUsers.map(u => u.telegram_id);
+  // Set/Map вместо includes/find — сверка за O(n)
+  const dbIds = new Set(dbUsers.map(u => u.telegram_id));
+  const channelIdsSet = new Set(channelIds);
+  const membersById = new Map(channelMembers.map(m => [m.id, m]));
   console.log('В базе:', dbUsers.length);
 
   // В канале, но НЕ в базе
-  const inChannelNotInDb = channelIds.filter(id => !dbIds.includes(id));
+  const inChannelNotInDb = channelIds.filter(id => !dbIds.has(id));
   console.log('\n=== В КАНАЛЕ, но НЕТ в базе (' + inChannelNotInDb.length + ') ===');
   inChannelNotInDb.forEach(id => {
-    const member = channelMembers.find(m => m.id === id);
+    const member = membersById.get(id);
     console.log('  ID:', id, '| @' + (member.username || 'no_username') + ' |', member.first_name || '');
   });
 
   // В базе с in_channel=true, но НЕТ в канале
   const dbInChannel = dbUsers.filter(u => u.in_channel === true);
-  const inDbNotInChannel = dbInChannel.filter(u => !channelIds.includes(u.telegram_id));
+  const inDbNotInChannel = dbInChannel.filter(u => !channelIdsSet.has(u.telegram_id));
   console.log('\n=== В базе in_channel=true, но НЕТ в канале (' + inDbNotInChannel.length + ') ===');
   inDbNotInChannel.slice(0, 30).forEach(u => {
     console.log('  ID:', u.telegram_id, '| @' + (u.username || 'no_username') + ' | expires:', u.expires_at);
@@ -49,7 +52,7 @@ async function compare() {
   // Истёкшие, которые ещё в канале
   const now = new Date().toISOString();
   const expiredInChannel = dbUsers.filter(u =>
-    channelIds.includes(u.telegram_id) &&
+    channelIdsSet.has(u.telegram_id) &&
     u.expires_at < now
   );
   console.log('\n=== ИСТЕКЛИ, но ещё В КАНАЛЕ (' + expiredInChannel.length + ') ===');
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Офлайн-замена TelegramClient для get_channel_members.py и send_invite.py.
+
+Синтетические канал и чат заданного размера (имена кириллицей и латиницей,
+юзернеймы, немного ботов), поиск как у Telegram (префикс любого слова имени
+или юзернейма, не больше limit результатов), задержка на каждый вызов,
+FloodWait при превышении лимита запросов и журнал всех вызовов.
+
+    client = FakeTelegramClient(channel_size=50000, latency=0.02, rate_limit=30)
+    users, stats = await crawl_members(client, await client.get_entity(CHANNEL_ID))
+"""
+
+import asyncio
+import bisect
+import random
+import time
+import types
+
+from telethon.errors import FloodWaitError
+from telethon.tl.functions.messages import ExportChatInviteRequest
+
+from get_channel_members import CHANNEL_ID, CHAT_ID
+
+RU_FIRST = ['Александр', 'Алексей', 'Андрей', 'Анна', 'Анастасия', 'Дмитрий', 'Евгений', 'Екатерина',
+            'Елена', 'Иван', 'Ирина', 'Максим', 'Мария', 'Михаил', 'Наталья', 'Никита', 'Ольга',
+            'Павел', 'Роман', 'Сергей', 'Светлана', 'Татьяна', 'Юлия', 'Владимир', 'Виктория',
+            'Артём', 'Денис', 'Кирилл', 'Олег', 'Игорь', 'Вера', 'Жанна', 'Эдуард', 'Юрий', 'Яна']
+RU_LAST = ['Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов',
+           'Новиков', 'Фёдоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семёнов', 'Егоров',
+           'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Орлов', 'Андреев', 'Макаров', 'Никитин',
+           'Захаров', 'Зайцев', 'Соловьёв', 'Борисов', 'Яковлев', 'Григорьев', 'Романов', 'Щербаков']
+EN_FIRST = ['Alex', 'Andrew', 'Anna', 'Daniel', 'David', 'Elena', 'Emma', 'George', 'Ivan', 'John',
+            'Kate', 'Max', 'Maria', 'Michael', 'Nick', 'Olga', 'Paul', 'Peter', 'Sam', 'Sergey',
+            'Tom', 'Victor', 'Yana', 'Zoe', 'Ben', 'Chris', 'Felix', 'Hugo', 'Leo', 'Quinn']
+EN_LAST = ['Smith', 'Brown', 'Taylor', 'Wilson', 'Johnson', 'Miller', 'Davis', 'Clark', 'Lewis',
+           'Walker', 'Young', 'King', 'Wright', 'Scott', 'Green', 'Baker', 'Adams', 'Nelson']
+USERNAME_TAILS = ['', '', '_', '1', '7', '88', '2000', '_official', '_pro', 'x', '777']
+SYLLABLES = ['ka', 'ri', 'to', 'mi', 'ne', 'sa', 'lo', 'vu', 'de', 'zy', 'gra', 'pel', 'shu', 'tin',
+             'bor', 'qi', 'xo', 'fa', 'jen', 'wo', 'ly', 'ch', 'ok', 'us', 'ar']
+
+
+class FakeUser(types.SimpleNamespace):
+    pass
+
+
+class FakeEntity(types.SimpleNamespace):
+    pass
+
+
+def _weighted(rng, items):
+    # Zipf-подобное распределение: первые имена встречаются заметно чаще
+    return items[min(int(rng.paretovariate(1.2)) - 1, len(items) - 1)] if rng.random() < 0.6 else rng.choice(items)
+
+
+def make_users(count, seed=0, first_id=10_000_000, bot_share=0.01):
+    """Синтетические участники с реалистичным распределением имён"""
+    rng = random.Random(seed)
+    users = []
+    for i in range(count):
+        cyrillic = rng.random() < 0.65
+        first = _weighted(rng, RU_FIRST if cyrillic else EN_FIRST)
+        last = _weighted(rng, RU_LAST if cyrillic else EN_LAST) if rng.random() < 0.55 else None
+        # Немного «странных» имён: эмодзи, одна буква — такие ищутся хуже
+        if rng.random() < 0.03:
+            first = rng.choice(['✨', '🔥', 'A', '.', 'Я'])
+        bot = rng.random() < bot_share
+        username = None
+        if bot or rng.random() < 0.7:
+            if rng.random() < 0.4:
+                # Длинный хвост: юзернеймы, не связанные с именем
+                base = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+            else:
+                base = (first if not cyrillic else rng.choice(EN_FIRST)).lower()
+            username = f"{base}{rng.choice(USERNAME_TAILS)}{rng.randrange(1000) if rng.random() < 0.5 else ''}"
+            if bot:
+                username += '_bot'
+        users.append(FakeUser(id=first_id + i, first_name=first, last_name=last,
+                              username=username, bot=bot))
+    return users
+
+
+class FakeGroup:
+    """Участники одной группы и индекс по префиксам слов для поиска"""
+
+    def __init__(self, entity, users):
+        self.entity = entity
+        self.users = users
+        tokens = []
+        for index, user in enumerate(users):
+            words = ' '.join(filter(None, [user.first_name, user.last_name, user.username])).lower().split()
+            for word in set(words):
+                tokens.append((word, index))
+        tokens.sort()
+        self.words = [word for word, _ in tokens]
+        self.owners = [index for _, index in tokens]
+
+    def search(self, query, limit):
+        query = query.lower()
+        if not query:
+            return self.users[:limit]
+        found = set()
+        i = bisect.bisect_left(self.words, query)
+        while i < len(self.words) and self.words[i].startswith(query):
+            found.add(self.owners[i])
+            i += 1
+        return [self.users[index] for index in sorted(found)[:limit]]
+
+
+class FakeTelegramClient:
+    """Подменяет нужную скриптам часть TelegramClient.
+
+    latency — средняя задержка вызова (с разбросом ±jitter), rate_limit —
+    сколько вызовов в секунду «сервер» терпит, прежде чем ответить FloodWait
+    на flood_seconds, connect_latency — время соединения и проверки авторизации
+    (по умолчанию 5 × latency). Все вызовы пишутся в self.calls как (время, метод, детали).
+    """
+
+    def __init__(self, channel_size=1000, chat_size=None, latency=0.02, jitter=0.5,
+                 rate_limit=30.0, flood_seconds=1, connect_latency=None, seed=0):
+        self.latency = latency
+        self.connect_latency = latency * 5 if connect_latency is None else connect_latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.flood_seconds = flood_seconds
+        self.rng = random.Random(seed)
+        self.calls = []
+        self.flood_waits = 0
+        self.sent = []
+        self.invites = 0
+        self._window = []
+
+        chat_size = chat_size if chat_size is not None else channel_size // 3
+        channel_users = make_users(channel_size, seed=seed)
+        # Чат — подмножество канала, как у клуба
+        chat_users = self.rng.sample(channel_users, min(chat_size, channel_size))
+        chat_users.sort(key=lambda u: u.id)
+        self.groups = {
+            CHANNEL_ID: FakeGroup(FakeEntity(id=CHANNEL_ID, title='AR Club (fake)',
+                                             participants_count=channel_size), channel_users),
+            CHAT_ID: FakeGroup(FakeEntity(id=CHAT_ID, title='AR Club chat (fake)',
+                                          participants_count=len(chat_users)), chat_users),
+        }
+        self.users = {u.id: u for u in channel_users}
+
+    async def _call(self, method, detail=None, limited=True):
+        self.calls.append((time.monotonic(), method, detail))
+        if not limited:
+            # disconnect/get_entity: сетевая задержка есть, лимит запросов не считаем
+            await asyncio.sleep(self.latency)
+            return
+        now = time.monotonic()
+        self._window = [t for t in self._window if now - t < 1.0]
+        if self.rate_limit and len(self._window) >= self.rate_limit:
+            self.flood_waits += 1
+            raise FloodWaitError(request=None, capture=self.flood_seconds)
+        self._window.append(now)
+        if self.latency:
+            spread = self.latency * self.jitter
+            await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-spread, spread)))
+
+    def _group(self, entity):
+        return self.groups[getattr(entity, 'id', entity)]
+
+    async def connect(self):
+        # Соединение + проверка авторизации — несколько round-trip
+        self.calls.append((time.monotonic(), 'connect', None))
+        await asyncio.sleep(self.connect_latency)
+
+    async def disconnect(self):
+        await self._call('disconnect', limited=False)
+
+    async def is_user_authorized(self):
+        return True
+
+    async def get_entity(self, peer):
+        await self._call('get_entity', peer, limited=False)
+        if peer in self.groups:
+            return self.groups[peer].entity
+        if peer in self.users:
+            return self.users[peer]
+        raise ValueError(f'Could not find the input entity for {peer}')
+
+    async def get_participants(self, entity, search='', limit=200):
+        await self._call('get_participants', search)
+        return self._group(entity).search(search, limit)
+
+    async def send_message(self, user, message):
+        await self._call('send_message', getattr(user, 'id', user))
+        self.sent.append(getattr(user, 'id', user))
+
+    async def __call__(self, request):
+        if isinstance(request, ExportChatInviteRequest):
+            await self._call('ExportChatInviteRequest', getattr(request.peer, 'id', None))
+            self.invites += 1
+            return types.SimpleNamespace(link=f'https://t.me/+fake{self.invites:08d}')
+        raise NotImplementedError(type(request).__name__)
+
+    def call_counts(self):
+        counts = {}
+        for _, method, _ in self.calls:
+            counts[method] = counts.get(method, 0) + 1
+        return counts
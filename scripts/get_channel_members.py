@@ -5,11 +5,16 @@
 
 import asyncio
 import sys
+import time
 from telethon import TelegramClient
+from telethon.errors import BadRequestError, FloodWaitError, ForbiddenError
 from telethon.tl.functions.channels import GetParticipantsRequest
 from telethon.tl.types import ChannelParticipantsSearch, ChannelParticipantsRecent, ChannelParticipantsAdmins
 import json
 
+from members_columnar import columns_path, write_columns
+from members_store import MembersStore
+
 # API credentials
 API_ID = 35438443
 API_HASH = '1c34e9c209e438e5ad09e207a5248164'
@@ -94,9 +99,160 @@ async def verify_code(code, phone_code_hash, password=None):
     print(f"\nВсего в канале: {len(all_participants)}")
 
     # Сохраняем
-    members_data = []
-    for user in all_participants:
-        members_data.append({
+    save_members(all_participants, 'channel_members.json')
+    print("Сохранено в channel_members.json")
+
+    # IDs без ботов
+    ids = [u.id for u in all_participants if not u.bot]
+    print(f"\nIDs ({len(ids)}):")
+    print(json.dumps(ids))
+
+    await client.disconnect()
+
+# Русские + английские буквы + цифры: обходим лимит 200 на один поиск
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя' + 'abcdefghijklmnopqrstuvwxyz' + '0123456789'
+SEARCH_LIMIT = 200
+
+
+class TokenBucket:
+    """Ограничитель запросов: rate запросов в секунду, всплеск до burst.
+
+    На FloodWait вызывается pause() — ждут все корутины, использующие этот лимитер,
+    а не только та, что получила ошибку.
+    """
+
+    def __init__(self, rate=5.0, burst=5):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+async def call_with_retry(limiter, make_call, label='', retries=5, stats=None):
+    """Вызов API через лимитер с повторами; FloodWait выдерживаем полностью.
+
+    make_call — функция без аргументов, возвращающая новую корутину на каждую попытку.
+    """
+    attempt = 0
+    while True:
+        await limiter.acquire()
+        if stats is not None:
+            stats['calls'] += 1
+        try:
+            return await make_call()
+        except FloodWaitError as e:
+            print(f"  FloodWait {e.seconds}s на {label}")
+            if stats is not None:
+                stats['flood_waits'] += 1
+            limiter.pause(e.seconds + 1)
+        except (BadRequestError, ForbiddenError):
+            # Повтор не поможет: приватность, неверный peer, нет прав
+            raise
+        except Exception as e:
+            attempt += 1
+            if attempt >= retries:
+                raise
+            print(f"  Ошибка на {label} ({e}), повтор {attempt}/{retries - 1}")
+            await asyncio.sleep(min(30, 2 ** attempt))
+
+
+async def fetch_query(client, entity, query, limiter, retries=5, stats=None):
+    """Один поисковый запрос с лимитером и повторами"""
+    return await call_with_retry(
+        limiter, lambda: client.get_participants(entity, search=query, limit=SEARCH_LIMIT),
+        label=f"'{query}'", retries=retries, stats=stats)
+
+
+async def crawl_members(client, entity, limiter=None, concurrency=8, target=None, max_depth=3):
+    """Параллельный обход поиском с адаптивным уточнением. Возвращает ({id: user}, stats).
+
+    Начинаем с пустого запроса и одиночных символов. Если запрос вернул ровно
+    SEARCH_LIMIT, он «насыщен» — часть совпадений отрезана, поэтому ставим в
+    очередь его уточнения (префикс + каждый символ алфавита), до max_depth
+    символов. Как только уникальных набралось target (participants_count),
+    оставшиеся запросы не отправляем.
+
+    Запросы, не прошедшие после всех повторов, попадают в stats['failed'],
+    а не теряются молча; насыщенные на max_depth (уточнять дальше нельзя) —
+    в stats['truncated']. stats['complete'] — обход можно считать полным
+    снимком: ничего не упало и найдены все target участников (без target —
+    ни один запрос не обрезан).
+    """
+    limiter = limiter or TokenBucket()
+    stats = {'calls': 0, 'flood_waits': 0, 'failed': {}, 'saturated': [], 'truncated': [], 'target': target}
+    users = {}
+    started = time.monotonic()
+    done = asyncio.Event()
+
+    queue = asyncio.Queue()
+    for query in [''] + list(ALPHABET):
+        queue.put_nowait(query)
+
+    async def worker():
+        while True:
+            query = await queue.get()
+            try:
+                if done.is_set():
+                    continue
+                try:
+                    participants = await fetch_query(client, entity, query, limiter, stats=stats)
+                except Exception as e:
+                    stats['failed'][query] = str(e)
+                    continue
+                for user in participants:
+                    users.setdefault(user.id, user)
+                if target and len(users) >= target:
+                    done.set()
+                # Пустой запрос не уточняем: одиночные символы уже в очереди
+                if query and len(participants) >= SEARCH_LIMIT:
+                    stats['saturated'].append(query)
+                    if len(query) < max_depth:
+                        for char in ALPHABET:
+                            queue.put_nowait(query + char)
+                    else:
+                        stats['truncated'].append(query)
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    await queue.join()
+    for task in workers:
+        task.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+    stats['found'] = len(users)
+    stats['coverage'] = len(users) / target if target else None
+    reached = len(users) >= target if target else not stats['truncated']
+    stats['complete'] = not stats['failed'] and reached
+    stats['seconds'] = time.monotonic() - started
+    return users, stats
+
+
+def save_members(users, path):
+    """JSON-список участников и рядом тот же список в колоночном формате (.cols)"""
+    data = []
+    for user in users:
+        data.append({
             'id': user.id,
             'username': user.username,
             'first_name': user.first_name,
@@ -104,21 +260,36 @@ async def verify_code(code, phone_code_hash, password=None):
             'is_bot': user.bot
         })
 
-    with open('channel_members.json', 'w', encoding='utf-8') as f:
-        json.dump(members_data, f, ensure_ascii=False, indent=2)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_columns(data, columns_path(path))
+    return data
 
-    print("Сохранено в channel_members.json")
 
-    # IDs без ботов
-    ids = [u.id for u in all_participants if not u.bot]
-    print(f"\nIDs ({len(ids)}):")
-    print(json.dumps(ids))
+def record_snapshot(store, chat_id, data, stats):
+    """Записать обход в members.db; выходы считаем только для полного обхода (stats['complete'])."""
+    joined, left = store.record_snapshot(chat_id, data, complete=stats['complete'])
+    note = '' if stats['complete'] else ' (обход неполный — выходы не записаны)'
+    print(f"  Изменения: +{len(joined)} / -{len(left)}{note}")
+
+
+def print_crawl_stats(stats):
+    coverage = f", покрытие {stats['coverage']:.1%} ({stats['found']}/{stats['target']})" if stats['target'] else ''
+    print(f"  Запросов: {stats['calls']}, FloodWait: {stats['flood_waits']}, {stats['seconds']:.1f}s{coverage}")
+    if stats['saturated']:
+        print(f"  Уточнены (>= {SEARCH_LIMIT}): {', '.join(repr(q) for q in stats['saturated'])}")
+    if stats['truncated']:
+        print(f"  Обрезаны на глубине {len(stats['truncated'][0])}: {', '.join(repr(q) for q in stats['truncated'])}")
+    for query, error in stats['failed'].items():
+        print(f"  Не удалось: '{query}': {error}")
 
-    await client.disconnect()
 
 async def get_members_authorized():
     """Если уже авторизован - просто получить участников"""
     client = TelegramClient('ar_arena_session', API_ID, API_HASH)
+    # Иначе FloodWait до 60s Telethon выжидает сам внутри одного запроса,
+    # и до call_with_retry он не доходит: общий лимитер не ставится на паузу
+    client.flood_sleep_threshold = 0
     await client.connect()
 
     if not await client.is_user_authorized():
@@ -130,89 +301,74 @@ async def get_members_authorized():
 
     # Получаем участников КАНАЛА используя get_participants (лучше для больших каналов)
     channel = await client.get_entity(CHANNEL_ID)
-    print(f"\n=== КАНАЛ: {channel.title} ===")
-    print(f"Участников по данным канала: {channel.participants_count}")
 
-    # Обходим лимит 200: ищем по буквам алфавита
-    all_users = {}
+    try:
+        chat = await client.get_entity(CHAT_ID)
+    except Exception as e:
+        print(f"Ошибка получения чата: {e}")
+        chat = None
 
-    # Русские + английские буквы + цифры
-    search_queries = [''] + list('абвгдеёжзийклмнопрстуфхцчшщъыьэюя') + list('abcdefghijklmnopqrstuvwxyz') + list('0123456789')
+    await crawl_and_save(client, channel, chat)
+    await client.disconnect()
 
-    for query in search_queries:
-        try:
-            participants = await client.get_participants(channel, search=query, limit=200)
-            for user in participants:
-                if user.id not in all_users:
-                    all_users[user.id] = user
-            if query == '':
-                print(f"  Базовый запрос: {len(participants)}")
-            elif len(participants) > 0:
-                print(f"  '{query}': +{len([u for u in participants if u.id not in all_users])}")
-        except Exception as e:
-            pass
 
+async def crawl_and_save(client, channel, chat=None, limiter=None):
+    """Обойти канал и чат, сохранить JSON и снимок в members.db. Возвращает сводку."""
+    print(f"\n=== КАНАЛ: {channel.title} ===")
+    print(f"Участников по данным канала: {channel.participants_count}")
+
+    # Канал и чат обходим параллельно через одно соединение и общий лимитер
+    limiter = limiter or TokenBucket()
+    crawls = [crawl_members(client, channel, limiter=limiter, target=channel.participants_count)]
+    if chat is not None:
+        crawls.append(crawl_members(client, chat, limiter=limiter,
+                                    target=getattr(chat, 'participants_count', None)))
+    results = await asyncio.gather(*crawls)
+
+    all_users, channel_stats = results[0]
     channel_participants = list(all_users.values())
     print(f"Всего уникальных участников: {len(channel_participants)}")
+    print_crawl_stats(channel_stats)
 
     # Сохраняем КАНАЛ
-    channel_data = []
-    for user in channel_participants:
-        channel_data.append({
-            'id': user.id,
-            'username': user.username,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'is_bot': user.bot
-        })
-
-    with open('channel_members.json', 'w', encoding='utf-8') as f:
-        json.dump(channel_data, f, ensure_ascii=False, indent=2)
-
+    store = MembersStore()
+    channel_data = save_members(channel_participants, 'channel_members.json')
     print("Сохранено в channel_members.json")
+    record_snapshot(store, CHANNEL_ID, channel_data, channel_stats)
 
-    # Теперь получаем ЧАТ
-    try:
-        chat = await client.get_entity(CHAT_ID)
+    # Теперь ЧАТ
+    if chat is not None:
         print(f"\n=== ЧАТ: {chat.title} ===")
-
-        chat_users = {}
-        search_queries = [''] + list('абвгдеёжзийклмнопрстуфхцчшщъыьэюя') + list('abcdefghijklmnopqrstuvwxyz') + list('0123456789')
-
-        for query in search_queries:
-            try:
-                participants = await client.get_participants(chat, search=query, limit=200)
-                for user in participants:
-                    if user.id not in chat_users:
-                        chat_users[user.id] = user
-            except:
-                pass
-
+        chat_users, chat_stats = results[1]
         chat_participants = list(chat_users.values())
         print(f"Всего в чате: {len(chat_participants)}")
+        print_crawl_stats(chat_stats)
 
-        chat_data = []
-        for user in chat_participants:
-            chat_data.append({
-                'id': user.id,
-                'username': user.username,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'is_bot': user.bot
-            })
-
-        with open('chat_members.json', 'w', encoding='utf-8') as f:
-            json.dump(chat_data, f, ensure_ascii=False, indent=2)
-
+        chat_data = save_members(chat_participants, 'chat_members.json')
         print("Сохранено в chat_members.json")
+        record_snapshot(store, CHAT_ID, chat_data, chat_stats)
 
         chat_ids = [u.id for u in chat_participants if not u.bot]
         print(f"IDs без ботов: {len(chat_ids)}")
 
-    except Exception as e:
-        print(f"Ошибка получения чата: {e}")
-
-    await client.disconnect()
+    store.close()
+    summary = {'channel': len(channel_participants), 'channel_stats': channel_stats}
+    if chat is not None:
+        summary.update({'chat': len(chat_participants), 'chat_stats': chat_stats})
+    return summary
+
+async def get_members():
+    # Если запущен telegram_worker.py — обход делает он, на своём соединении
+    from telegram_worker import submit
+
+    response = await submit({'job': 'crawl'})
+    if response is None:
+        await get_members_authorized()
+    elif response['ok']:
+        summary = response['result']
+        print(f"Воркер: канал {summary['channel']}, чат {summary.get('chat', '-')}")
+    else:
+        print(f"Ошибка воркера: {response['error']}")
 
 if __name__ == '__main__':
     if len(sys.argv) == 1:
@@ -220,7 +376,7 @@ if __name__ == '__main__':
         asyncio.run(send_code())
     elif sys.argv[1] == 'get':
         # Получить участников (если уже авторизован)
-        asyncio.run(get_members_authorized())
+        asyncio.run(get_members())
     elif len(sys.argv) >= 3:
         # Ввод кода: python script.py CODE HASH [PASSWORD]
         code = sys.argv[1]
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Компактный колоночный формат списка участников (.cols) рядом с *_members.json.
+
+Файл читается через mmap: проверка «есть ли id» — бинарный поиск по
+отсортированной колонке id, разность двух списков — слиянием двух колонок.
+Словари на каждого участника не создаются; строки декодируются только
+по запросу для конкретной строки.
+
+Формат (little-endian):
+    заголовок   magic 'ARCOLS01', count, strings (uint32), смещения секций (uint64)
+    ids         count × int64, по возрастанию
+    username,
+    first_name,
+    last_name   count × uint32 — номер строки в таблице, 0 = None
+    bots        бит на участника (1 = бот), младший бит — первый
+    offsets     (strings + 1) × uint32 — границы строк в data
+    data        UTF-8 строк подряд, каждая уникальная строка один раз
+
+    python members_columnar.py convert channel_members.json
+    python members_columnar.py has channel_members.cols 144828618 7229873140
+    python members_columnar.py diff channel_members.cols chat_members.cols --no-bots
+    python members_columnar.py diff chat_members.cols premium_ids.json   # JSON или id через пробел
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from members_store import read_ids
+
+MAGIC = b'ARCOLS01'
+HEADER = struct.Struct('<8sII6Q')
+STRING_COLUMNS = ('username', 'first_name', 'last_name')
+
+
+def columns_path(json_path):
+    """channel_members.json -> channel_members.cols"""
+    return os.path.splitext(json_path)[0] + '.cols'
+
+
+def _little_endian(arr):
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr
+
+
+def _align(f, boundary=8):
+    pad = -f.tell() % boundary
+    f.write(b'\0' * pad)
+    return f.tell()
+
+
+def write_columns(members, path):
+    """Записать список dict (как в channel_members.json) в колоночный файл"""
+    rows = sorted(members, key=lambda m: m['id'])
+    # Строка 0 — None; одинаковые имена хранятся один раз
+    strings = {None: 0}
+    table = [b'']
+    columns = {name: array('I') for name in STRING_COLUMNS}
+    for m in rows:
+        for name in STRING_COLUMNS:
+            value = m.get(name)
+            if value not in strings:
+                strings[value] = len(table)
+                table.append(value.encode('utf-8'))
+            columns[name].append(strings[value])
+
+    ids = array('q', (m['id'] for m in rows))
+    bots = bytearray((len(rows) + 7) // 8)
+    for i, m in enumerate(rows):
+        if m.get('is_bot'):
+            bots[i >> 3] |= 1 << (i & 7)
+    offsets = array('I', [0])
+    for s in table:
+        offsets.append(offsets[-1] + len(s))
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(b'\0' * HEADER.size)
+        sections = []
+        for block in [_little_endian(ids)] + [_little_endian(columns[n]) for n in STRING_COLUMNS]:
+            sections.append(_align(f))
+            f.write(block.tobytes())
+        sections.append(f.tell())
+        f.write(bots)
+        sections.append(_align(f, 4))
+        f.write(_little_endian(offsets).tobytes())
+        f.write(b''.join(table))
+        # Смещения: ids, username, first_name, last_name, bots, offsets (data — сразу за offsets)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(rows), len(table), *sections))
+    os.replace(tmp, path)
+
+
+class MembersColumns:
+    """Колоночный файл участников, открытый через mmap.
+
+        with MembersColumns('channel_members.cols') as cols:
+            144828618 in cols
+            cols.difference(other_cols, include_bots=False)
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise RuntimeError('members_columnar: поддерживается только little-endian')
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, strings, *sections = HEADER.unpack_from(self.mm)
+        if magic != MAGIC:
+            self.mm.close()
+            raise ValueError(f'{path}: не колоночный файл участников')
+        ids_at, *column_at, bots_at, offsets_at = sections
+        n = self.count
+        view = memoryview(self.mm)
+        self.ids = view[ids_at:ids_at + 8 * n].cast('q')
+        self.columns = {name: view[at:at + 4 * n].cast('I') for name, at in zip(STRING_COLUMNS, column_at)}
+        self.bots = view[bots_at:bots_at + (n + 7) // 8]
+        self.offsets = view[offsets_at:offsets_at + 4 * (strings + 1)].cast('I')
+        self.data_at = offsets_at + 4 * (strings + 1)
+
+    def close(self):
+        # Все memoryview должны быть освобождены до закрытия mmap
+        for v in [self.ids, self.bots, self.offsets, *self.columns.values()]:
+            v.release()
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def index(self, user_id):
+        """Номер строки участника или -1"""
+        i = bisect.bisect_left(self.ids, user_id)
+        return i if i < self.count and self.ids[i] == user_id else -1
+
+    def __contains__(self, user_id):
+        return self.index(user_id) >= 0
+
+    def is_bot(self, i):
+        return bool(self.bots[i >> 3] & (1 << (i & 7)))
+
+    def string(self, column, i):
+        k = self.columns[column][i]
+        if not k:
+            return None
+        start, end = self.offsets[k], self.offsets[k + 1]
+        return self.mm[self.data_at + start:self.data_at + end].decode('utf-8')
+
+    def row(self, i):
+        """Одна строка в виде dict, как в channel_members.json"""
+        row = {'id': self.ids[i]}
+        for name in STRING_COLUMNS:
+            row[name] = self.string(name, i)
+        row['is_bot'] = self.is_bot(i)
+        return row
+
+    def iter_ids(self, include_bots=True):
+        if include_bots:
+            return iter(self.ids)
+        return (self.ids[i] for i in range(self.count) if not self.is_bot(i))
+
+    def difference(self, other, include_bots=True):
+        """id, которые есть здесь и нет в other (MembersColumns или любой набор id), по возрастанию"""
+        if isinstance(other, MembersColumns):
+            theirs, m = other.ids, other.count
+        else:
+            theirs = sorted(set(other))
+            m = len(theirs)
+        result = []
+        j = 0
+        for user_id in self.iter_ids(include_bots):
+            # Обе последовательности отсортированы — один проход слиянием
+            while j < m and theirs[j] < user_id:
+                j += 1
+            if j == m or theirs[j] != user_id:
+                result.append(user_id)
+        return result
+
+
+def _open_ids(path):
+    """Колоночный файл открывается через mmap, остальное — как список id"""
+    if path != '-' and path.endswith('.cols'):
+        return MembersColumns(path)
+    return read_ids(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Колоночный формат списка участников')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('convert', help='*_members.json -> *.cols')
+    p.add_argument('paths', nargs='+')
+
+    p = sub.add_parser('has', help='есть ли id в файле')
+    p.add_argument('path')
+    p.add_argument('ids', type=int, nargs='+')
+
+    p = sub.add_parser('diff', help='в первом файле и не во втором (и наоборот)')
+    p.add_argument('path', help='.cols')
+    p.add_argument('other', help='.cols, JSON-список или id через пробел (- для stdin)')
+    p.add_argument('--no-bots', action='store_true', help='не учитывать ботов')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        for path in args.paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                members = json.load(f)
+            out = columns_path(path)
+            write_columns(members, out)
+            print(f"{path} -> {out}: {len(members)} участников, {os.path.getsize(out)} байт "
+                  f"(JSON {os.path.getsize(path)})")
+    elif args.command == 'has':
+        with MembersColumns(args.path) as cols:
+            for user_id in args.ids:
+                i = cols.index(user_id)
+                print(json.dumps(cols.row(i) if i >= 0 else {'id': user_id, 'present': False},
+                                 ensure_ascii=False))
+    elif args.command == 'diff':
+        include_bots = not args.no_bots
+        with MembersColumns(args.path) as cols:
+            other = _open_ids(args.other)
+            extra = cols.difference(other, include_bots)
+            if isinstance(other, MembersColumns):
+                missing = other.difference(cols, include_bots)
+                other.close()
+            else:
+                missing = [user_id for user_id in sorted(set(other)) if user_id not in cols]
+        print(json.dumps({'only_in_first': extra, 'only_in_second': missing}))
+
+
+if __name__ == '__main__':
+    main()
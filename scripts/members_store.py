@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Локальное хранилище участников канала/чата (SQLite) с журналом входов/выходов.
+
+Каждый обход записывается как снимок: в журнал попадают только изменения
+(join/leave), файл не переписывается целиком. Сверка со списком premium-клиентов
+— одним запросом через временную таблицу, O(n).
+
+    python members_store.py import -1001634734020 channel_members.json
+    python members_store.py diff -1001634734020 premium_ids.json   # или '-' для stdin
+    python members_store.py log -1001634734020 --days 7
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+
+DB_PATH = 'members.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS members (
+    chat_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    username TEXT,
+    first_name TEXT,
+    last_name TEXT,
+    is_bot INTEGER NOT NULL DEFAULT 0,
+    present INTEGER NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (chat_id, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    chat_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('join', 'leave')),
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_chat_at ON events (chat_id, at);
+
+CREATE TABLE IF NOT EXISTS crawls (
+    id INTEGER PRIMARY KEY,
+    chat_id INTEGER NOT NULL,
+    at REAL NOT NULL,
+    found INTEGER NOT NULL,
+    complete INTEGER NOT NULL
+);
+"""
+
+
+class MembersStore:
+    def __init__(self, path=DB_PATH):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def current_ids(self, chat_id):
+        rows = self.db.execute(
+            'SELECT user_id FROM members WHERE chat_id = ? AND present = 1', (chat_id,))
+        return {row[0] for row in rows}
+
+    def record_snapshot(self, chat_id, members, complete=True, at=None):
+        """Записать результат обхода: members — список dict как в channel_members.json.
+
+        Выходы фиксируются только для полного обхода (complete=True): если часть
+        запросов упала, отсутствие человека в снимке ещё не значит, что он вышел.
+        Возвращает (joined, left) — множества user_id.
+        """
+        at = at or time.time()
+        before = self.current_ids(chat_id)
+        seen = {m['id'] for m in members}
+        joined = seen - before
+        left = before - seen if complete else set()
+
+        with self.db:
+            self.db.executemany(
+                """
+                INSERT INTO members (chat_id, user_id, username, first_name, last_name, is_bot,
+                                     present, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+                ON CONFLICT (chat_id, user_id) DO UPDATE SET
+                    username = excluded.username,
+                    first_name = excluded.first_name,
+                    last_name = excluded.last_name,
+                    is_bot = excluded.is_bot,
+                    present = 1,
+                    last_seen = excluded.last_seen
+                """,
+                [(chat_id, m['id'], m.get('username'), m.get('first_name'), m.get('last_name'),
+                  int(bool(m.get('is_bot'))), at, at) for m in members],
+            )
+            self.db.executemany(
+                'UPDATE members SET present = 0 WHERE chat_id = ? AND user_id = ?',
+                [(chat_id, user_id) for user_id in left],
+            )
+            self.db.executemany(
+                'INSERT INTO events (chat_id, user_id, kind, at) VALUES (?, ?, ?, ?)',
+                [(chat_id, user_id, 'join', at) for user_id in joined]
+                + [(chat_id, user_id, 'leave', at) for user_id in left],
+            )
+            self.db.execute(
+                'INSERT INTO crawls (chat_id, at, found, complete) VALUES (?, ?, ?, ?)',
+                (chat_id, at, len(seen), int(complete)),
+            )
+        return joined, left
+
+    def diff(self, chat_id, ids, include_bots=False):
+        """Сверка со списком id (например, premium_clients.telegram_id).
+
+        Возвращает (в группе, но не в списке; в списке, но не в группе).
+        """
+        with self.db:
+            self.db.execute('CREATE TEMP TABLE IF NOT EXISTS wanted (user_id INTEGER PRIMARY KEY)')
+            self.db.execute('DELETE FROM wanted')
+            self.db.executemany('INSERT OR IGNORE INTO wanted VALUES (?)', ((int(i),) for i in ids))
+            bots = '' if include_bots else 'AND m.is_bot = 0'
+            extra = [row[0] for row in self.db.execute(
+                f"""
+                SELECT m.user_id FROM members m
+                LEFT JOIN wanted w ON w.user_id = m.user_id
+                WHERE m.chat_id = ? AND m.present = 1 {bots} AND w.user_id IS NULL
+                """, (chat_id,))]
+            missing = [row[0] for row in self.db.execute(
+                """
+                SELECT w.user_id FROM wanted w
+                LEFT JOIN members m ON m.user_id = w.user_id AND m.chat_id = ? AND m.present = 1
+                WHERE m.user_id IS NULL
+                """, (chat_id,))]
+        return extra, missing
+
+    def events(self, chat_id, since=0.0):
+        rows = self.db.execute(
+            """
+            SELECT e.at, e.kind, e.user_id, m.username, m.first_name
+            FROM events e LEFT JOIN members m ON m.chat_id = e.chat_id AND m.user_id = e.user_id
+            WHERE e.chat_id = ? AND e.at >= ? ORDER BY e.at, e.id
+            """, (chat_id, since))
+        return rows.fetchall()
+
+
+def read_ids(path):
+    """id из JSON (список id или dict с 'id') или через пробел; '-' — stdin"""
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    with f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        # Просто id через пробел/перевод строки
+        return [int(token) for token in text.split()]
+    return [item['id'] if isinstance(item, dict) else item for item in data]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Хранилище участников с журналом изменений')
+    parser.add_argument('--db', default=DB_PATH)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('import', help='записать снимок из JSON (channel_members.json)')
+    p.add_argument('chat_id', type=int)
+    p.add_argument('path')
+    p.add_argument('--partial', action='store_true', help='неполный обход: выходы не фиксировать')
+
+    p = sub.add_parser('diff', help='сверка со списком id (JSON-список или id через пробел)')
+    p.add_argument('chat_id', type=int)
+    p.add_argument('ids')
+    p.add_argument('--bots', action='store_true', help='учитывать ботов')
+
+    p = sub.add_parser('log', help='журнал входов/выходов')
+    p.add_argument('chat_id', type=int)
+    p.add_argument('--days', type=float, default=30)
+
+    args = parser.parse_args(argv)
+    store = MembersStore(args.db)
+
+    if args.command == 'import':
+        with open(args.path, 'r', encoding='utf-8') as f:
+            members = json.load(f)
+        joined, left = store.record_snapshot(args.chat_id, members, complete=not args.partial)
+        print(f"Снимок: {len(members)}, вошли: {len(joined)}, вышли: {len(left)}")
+    elif args.command == 'diff':
+        extra, missing = store.diff(args.chat_id, read_ids(args.ids), include_bots=args.bots)
+        print(json.dumps({'in_group_not_in_list': extra, 'in_list_not_in_group': missing}))
+    elif args.command == 'log':
+        since = time.time() - args.days * 86400
+        for at, kind, user_id, username, first_name in store.events(args.chat_id, since):
+            when = time.strftime('%Y-%m-%d %H:%M', time.localtime(at))
+            print(f"{when} {kind:5} {user_id} @{username or '-'} {first_name or ''}")
+
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,62 +1,281 @@
 #!/usr/bin/env python3
 import asyncio
+import json
+import os
 import sys
+import time
 from telethon import TelegramClient
 from telethon.tl.functions.messages import ExportChatInviteRequest
 
+from get_channel_members import TokenBucket, call_with_retry
+
 API_ID = 35438443
 API_HASH = '1c34e9c209e438e5ad09e207a5248164'
 CHANNEL_ID = -1001634734020
 CHAT_ID = -1001828659569
 
+
+def invite_message(channel_link, chat_link):
+    return f"""🎉 Ваши ссылки для доступа к AR Club:
+
+📺 Канал: {channel_link}
+💬 Чат: {chat_link}
+
+Ссылки одноразовые, используйте их сейчас!"""
+
+
+async def export_link(client, peer):
+    """Одна одноразовая ссылка"""
+    invite = await client(ExportChatInviteRequest(peer=peer, usage_limit=1, expire_date=None))
+    return invite.link
+
+
+async def issue_links(client, channel, chat):
+    """Две одноразовые ссылки: (канал, чат)"""
+    return await asyncio.gather(export_link(client, channel), export_link(client, chat))
+
+
+async def send_links(client, user, channel_link, chat_link):
+    await client.send_message(user, invite_message(channel_link, chat_link))
+
+
 async def create_and_send_links(user_id):
     client = TelegramClient('ar_arena_session', API_ID, API_HASH)
+    # FloodWait обрабатывает call_with_retry, а не Telethon
+    client.flood_sleep_threshold = 0
     await client.connect()
 
     if not await client.is_user_authorized():
         print("NOT_AUTHORIZED")
         return
 
-    # Создаём ссылки
+    # Создаём ссылки: каждую с повторами отдельно, чтобы FloodWait на второй не терял первую
+    limiter = TokenBucket()
     channel = await client.get_entity(CHANNEL_ID)
     chat = await client.get_entity(CHAT_ID)
+    channel_link = await call_with_retry(limiter, lambda: export_link(client, channel),
+                                         label='ссылка на канал')
+    chat_link = await call_with_retry(limiter, lambda: export_link(client, chat),
+                                      label='ссылка на чат')
 
-    channel_invite = await client(ExportChatInviteRequest(
-        peer=channel,
-        usage_limit=1,
-        expire_date=None
-    ))
-
-    chat_invite = await client(ExportChatInviteRequest(
-        peer=chat,
-        usage_limit=1,
-        expire_date=None
-    ))
-
-    print(f"Канал: {channel_invite.link}")
-    print(f"Чат: {chat_invite.link}")
+    print(f"Канал: {channel_link}")
+    print(f"Чат: {chat_link}")
 
     # Отправляем пользователю
-    message = f"""🎉 Ваши ссылки для доступа к AR Club:
-
-📺 Канал: {channel_invite.link}
-💬 Чат: {chat_invite.link}
-
-Ссылки одноразовые, используйте их сейчас!"""
-
     try:
         user = await client.get_entity(int(user_id))
-        await client.send_message(user, message)
+        await call_with_retry(limiter, lambda: send_links(client, user, channel_link, chat_link),
+                              label='отправка', retries=3)
         print(f"\n✅ Отправлено пользователю {user_id}")
     except Exception as e:
         print(f"\n❌ Ошибка отправки: {e}")
         print(f"\nСсылки (отправь вручную):")
-        print(message)
+        print(invite_message(channel_link, chat_link))
 
     await client.disconnect()
 
+
+LEDGER_PATH = 'invites_ledger.jsonl'
+
+
+def read_user_ids(source):
+    """id из файла или stdin ('-'): через пробел, запятую или построчно; '#' — комментарий"""
+    f = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8')
+    ids = []
+    with f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            ids.extend(int(token) for token in line.replace(',', ' ').split())
+    # Без дублей, порядок сохраняем
+    return list(dict.fromkeys(ids))
+
+
+def load_ledger(path):
+    """Последнее состояние по каждому user_id: {'status': ..., ссылки...}
+
+    Статусы: channel_issued (есть ссылка на канал), issued (обе ссылки),
+    sent, send_failed, issue_failed. Ссылки из прошлых записей сохраняются.
+    """
+    state = {}
+    if not os.path.exists(path):
+        return state
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Обрезанная последняя строка после падения
+                continue
+            state.setdefault(record['user_id'], {}).update(record)
+    return state
+
+
+class Ledger:
+    """Журнал JSONL: каждая запись сразу на диск, чтобы после падения не выдавать ссылки повторно"""
+
+    def __init__(self, path):
+        self.f = open(path, 'a', encoding='utf-8')
+        # После падения последняя строка может быть обрезана: новая запись
+        # не должна склеиться с ней, иначе load_ledger пропустит обе
+        if self.f.tell() and not self._ends_with_newline(path):
+            self.f.write('\n')
+
+    @staticmethod
+    def _ends_with_newline(path):
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def write(self, user_id, status, **fields):
+        record = {'user_id': user_id, 'status': status, 'at': time.time(), **fields}
+        self.f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self):
+        self.f.close()
+
+
+async def bulk_invite(client, channel, chat, user_ids, ledger_path=LEDGER_PATH,
+                      issue_concurrency=4, send_concurrency=4, limiter=None):
+    """Выдать и отправить ссылки пачке пользователей.
+
+    Выдача ссылок и доставка идут конвейером: пока одни сообщения отправляются,
+    для следующих пользователей уже создаются ссылки. Уже отправленные по
+    журналу пропускаются; выданные, но не доставленные — досылаются теми же
+    ссылками, без новой выдачи.
+
+    Ссылки на канал и на чат выдаются и повторяются по отдельности, и каждая
+    сразу пишется в журнал: FloodWait на второй не выбрасывает первую.
+    """
+    limiter = limiter or TokenBucket()
+    state = load_ledger(ledger_path)
+    ledger = Ledger(ledger_path)
+    stats = {'calls': 0, 'flood_waits': 0, 'issued': 0, 'sent': 0, 'failed': 0, 'skipped': 0}
+    started = time.monotonic()
+
+    ready = asyncio.Queue(maxsize=send_concurrency * 4)
+    issue_slots = asyncio.Semaphore(issue_concurrency)
+
+    async def issue(user_id):
+        previous = state.get(user_id, {})
+        if previous.get('status') == 'sent':
+            stats['skipped'] += 1
+            return
+        if 'chat_link' in previous:
+            await ready.put((user_id, previous['channel_link'], previous['chat_link']))
+            return
+        async with issue_slots:
+            try:
+                channel_link = previous.get('channel_link')
+                if channel_link is None:
+                    channel_link = await call_with_retry(
+                        limiter, lambda: export_link(client, channel),
+                        label=f"ссылка на канал для {user_id}", stats=stats)
+                    ledger.write(user_id, 'channel_issued', channel_link=channel_link)
+                chat_link = await call_with_retry(
+                    limiter, lambda: export_link(client, chat),
+                    label=f"ссылка на чат для {user_id}", stats=stats)
+            except Exception as e:
+                stats['failed'] += 1
+                ledger.write(user_id, 'issue_failed', error=str(e))
+                return
+        stats['issued'] += 1
+        ledger.write(user_id, 'issued', channel_link=channel_link, chat_link=chat_link)
+        await ready.put((user_id, channel_link, chat_link))
+
+    async def deliver():
+        while True:
+            user_id, channel_link, chat_link = await ready.get()
+            try:
+                user = await client.get_entity(user_id)
+                await call_with_retry(
+                    limiter, lambda: send_links(client, user, channel_link, chat_link),
+                    label=f"отправка {user_id}", retries=3, stats=stats)
+                stats['sent'] += 1
+                ledger.write(user_id, 'sent')
+            except Exception as e:
+                stats['failed'] += 1
+                ledger.write(user_id, 'send_failed', error=str(e))
+                print(f"❌ {user_id}: {e}")
+            finally:
+                ready.task_done()
+
+    senders = [asyncio.create_task(deliver()) for _ in range(send_concurrency)]
+    try:
+        await asyncio.gather(*(issue(user_id) for user_id in user_ids))
+        await ready.join()
+    finally:
+        for task in senders:
+            task.cancel()
+        await asyncio.gather(*senders, return_exceptions=True)
+        ledger.close()
+
+    stats['seconds'] = time.monotonic() - started
+    return stats
+
+
+def print_bulk_stats(stats):
+    print(f"Выдано: {stats['issued']}, отправлено: {stats['sent']}, ошибок: {stats['failed']}, "
+          f"уже было: {stats['skipped']}, FloodWait: {stats['flood_waits']}, {stats['seconds']:.1f}s")
+
+
+async def bulk_invite_direct(user_ids, ledger_path):
+    client = TelegramClient('ar_arena_session', API_ID, API_HASH)
+    # FloodWait обрабатывает call_with_retry, а не Telethon
+    client.flood_sleep_threshold = 0
+    await client.connect()
+
+    if not await client.is_user_authorized():
+        print("NOT_AUTHORIZED")
+        return
+
+    channel = await client.get_entity(CHANNEL_ID)
+    chat = await client.get_entity(CHAT_ID)
+
+    stats = await bulk_invite(client, channel, chat, user_ids, ledger_path)
+    print_bulk_stats(stats)
+
+    await client.disconnect()
+
+
+async def bulk_main(source, ledger_path):
+    # Если запущен telegram_worker.py — пачка идёт через его соединение:
+    # второй клиент на той же сессии упёрся бы в блокировку её SQLite-файла
+    from telegram_worker import submit
+
+    user_ids = read_user_ids(source)
+    ledger_path = os.path.abspath(ledger_path)
+    print(f"Пользователей: {len(user_ids)}, журнал: {ledger_path}")
+
+    response = await submit({'job': 'bulk', 'user_ids': user_ids, 'ledger': ledger_path})
+    if response is None:
+        await bulk_invite_direct(user_ids, ledger_path)
+    elif response['ok']:
+        print_bulk_stats(response['result'])
+    else:
+        print(f"Ошибка воркера: {response['error']}")
+
+
+async def main(user_id):
+    # Если запущен telegram_worker.py — отправляем через него, без своего соединения
+    from telegram_worker import print_invite_result, submit
+
+    response = await submit({'job': 'invite', 'user_id': int(user_id)})
+    if response is None:
+        await create_and_send_links(user_id)
+    elif response['ok']:
+        print_invite_result(user_id, response['result'])
+    else:
+        print(f"Ошибка воркера: {response['error']}")
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         print("Usage: python send_invite.py USER_ID")
+        print("       python send_invite.py --bulk FILE|- [LEDGER]")
+    elif sys.argv[1] == '--bulk' and len(sys.argv) >= 3:
+        # Пачка id из файла или stdin, с журналом для продолжения после падения
+        ledger_path = sys.argv[3] if len(sys.argv) > 3 else LEDGER_PATH
+        asyncio.run(bulk_main(sys.argv[2], ledger_path))
     else:
-        asyncio.run(create_and_send_links(sys.argv[1]))
+        asyncio.run(main(sys.argv[1]))
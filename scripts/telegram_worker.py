@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Долгоживущий Telethon-воркер: одно авторизованное соединение, кэш сущностей
+и очередь заданий через локальный unix-сокет.
+
+Запуск:
+    python telegram_worker.py serve
+
+Задания (JSON-строка на соединение, ответ — JSON-строка):
+    {"job": "invite", "user_id": 123}   — выдать и отправить ссылки
+    {"job": "crawl"}                    — обойти канал и чат (как get_channel_members.py get)
+    {"job": "bulk", "user_ids": [...], "ledger": "/abs/path.jsonl"}
+                                        — пачка приглашений (как send_invite.py --bulk)
+    {"job": "ping"}
+
+Из командной строки:
+    python telegram_worker.py invite 123
+    python telegram_worker.py crawl
+
+send_invite.py (и с --bulk) и get_channel_members.py сами отправляют задание воркеру,
+если он запущен, и работают напрямую, если нет.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+from telethon import TelegramClient
+
+from get_channel_members import (API_ID, API_HASH, CHANNEL_ID, CHAT_ID, TokenBucket, call_with_retry,
+                                 crawl_and_save)
+from send_invite import bulk_invite, export_link, invite_message, send_links
+
+SOCKET_PATH = os.environ.get('AR_WORKER_SOCKET', 'ar_arena_worker.sock')
+
+
+class TelegramWorker:
+    def __init__(self, client, concurrency=8):
+        self.client = client
+        self.entities = {}
+        self.entity_locks = {}
+        self.limiter = TokenBucket()
+        self.jobs = asyncio.Semaphore(concurrency)
+        # Два обхода одновременно писали бы в одни и те же файлы
+        self.crawl_lock = asyncio.Lock()
+        # И две пачки приглашений — в один журнал
+        self.bulk_lock = asyncio.Lock()
+
+    async def entity(self, peer_id):
+        """get_entity с кэшем: каждая сущность резолвится один раз за жизнь воркера"""
+        if peer_id in self.entities:
+            return self.entities[peer_id]
+        lock = self.entity_locks.setdefault(peer_id, asyncio.Lock())
+        async with lock:
+            if peer_id not in self.entities:
+                self.entities[peer_id] = await self.client.get_entity(peer_id)
+        return self.entities[peer_id]
+
+    async def invite(self, user_id):
+        channel, chat = await asyncio.gather(self.entity(CHANNEL_ID), self.entity(CHAT_ID))
+        # Каждая ссылка — отдельный запрос с повторами, как в bulk_invite: FloodWait
+        # ставит на паузу общий лимитер, а ссылка на канал не теряется из-за чата
+        channel_link = await call_with_retry(self.limiter, lambda: export_link(self.client, channel),
+                                             label=f"ссылка на канал для {user_id}")
+        chat_link = await call_with_retry(self.limiter, lambda: export_link(self.client, chat),
+                                          label=f"ссылка на чат для {user_id}")
+        result = {'channel_link': channel_link, 'chat_link': chat_link, 'sent': False}
+        try:
+            user = await self.entity(int(user_id))
+            await call_with_retry(self.limiter,
+                                  lambda: send_links(self.client, user, channel_link, chat_link),
+                                  label=f"отправка {user_id}", retries=3)
+            result['sent'] = True
+        except Exception as e:
+            result['send_error'] = str(e)
+        return result
+
+    async def crawl(self):
+        async with self.crawl_lock:
+            channel = await self.entity(CHANNEL_ID)
+            try:
+                chat = await self.entity(CHAT_ID)
+            except Exception as e:
+                print(f"Ошибка получения чата: {e}")
+                chat = None
+            return await crawl_and_save(self.client, channel, chat, limiter=self.limiter)
+
+    async def bulk(self, user_ids, ledger_path):
+        async with self.bulk_lock:
+            channel, chat = await asyncio.gather(self.entity(CHANNEL_ID), self.entity(CHAT_ID))
+            return await bulk_invite(self.client, channel, chat, [int(u) for u in user_ids],
+                                     ledger_path, limiter=self.limiter)
+
+    async def run_job(self, job):
+        kind = job.get('job')
+        async with self.jobs:
+            if kind == 'invite':
+                return await self.invite(job['user_id'])
+            if kind == 'crawl':
+                return await self.crawl()
+            if kind == 'bulk':
+                return await self.bulk(job['user_ids'], job['ledger'])
+            if kind == 'ping':
+                return {'pong': True, 'cached_entities': len(self.entities)}
+        raise ValueError(f"unknown job: {kind}")
+
+    async def handle(self, reader, writer):
+        try:
+            job = json.loads(await reader.readline())
+            try:
+                response = {'ok': True, 'result': await self.run_job(job)}
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+            writer.write(json.dumps(response, ensure_ascii=False).encode() + b'\n')
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(path=SOCKET_PATH):
+    client = TelegramClient('ar_arena_session', API_ID, API_HASH)
+    # Каждый FloodWait — в call_with_retry, чтобы пауза была общей для всех заданий
+    client.flood_sleep_threshold = 0
+    await client.connect()
+    if not await client.is_user_authorized():
+        print("NOT_AUTHORIZED")
+        await client.disconnect()
+        return
+
+    worker = TelegramWorker(client)
+    # Прогреваем кэш сущностей
+    await worker.entity(CHANNEL_ID)
+    await worker.entity(CHAT_ID)
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(worker.handle, path=path)
+    print(f"Воркер слушает {path}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        os.unlink(path)
+        await client.disconnect()
+
+
+async def submit(job, path=SOCKET_PATH):
+    """Отправить задание воркеру. None, если воркер не запущен."""
+    try:
+        reader, writer = await asyncio.open_unix_connection(path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    writer.write(json.dumps(job).encode() + b'\n')
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    writer.close()
+    return response
+
+
+def print_invite_result(user_id, result):
+    print(f"Канал: {result['channel_link']}")
+    print(f"Чат: {result['chat_link']}")
+    if result['sent']:
+        print(f"\n✅ Отправлено пользователю {user_id}")
+    else:
+        print(f"\n❌ Ошибка отправки: {result['send_error']}")
+        print(f"\nСсылки (отправь вручную):")
+        print(invite_message(result['channel_link'], result['chat_link']))
+
+
+async def main(argv):
+    if argv[:1] == ['serve']:
+        await serve()
+        return
+    if argv[:1] == ['invite'] and len(argv) == 2:
+        job = {'job': 'invite', 'user_id': int(argv[1])}
+    elif argv[:1] in (['crawl'], ['ping']):
+        job = {'job': argv[0]}
+    else:
+        print("Usage: python telegram_worker.py serve | invite USER_ID | crawl | ping")
+        return
+
+    response = await submit(job)
+    if response is None:
+        print(f"Воркер не запущен ({SOCKET_PATH})")
+    elif not response['ok']:
+        print(f"Ошибка: {response['error']}")
+    elif job['job'] == 'invite':
+        print_invite_result(job['user_id'], response['result'])
+    else:
+        print(json.dumps(response['result'], ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,76 @@
+import io
+
+import pytest
+from PIL import Image
+
+np = pytest.importorskip("numpy")
+
+import remove_background as rb
+
+MODES = ["RGBA", "RGB", "P", "L", "LA"]
+THRESHOLDS = [-1, 0, 20, 255, 300]
+
+
+def _source(mode, size=(37, 23)):
+    """Random pixels with near-black patches, so every threshold keys something different."""
+    rng = np.random.default_rng(len(mode))
+    pixels = rng.integers(0, 256, (size[1], size[0], 4), dtype=np.uint8)
+    dark = rng.random(size[::-1]) < 0.3
+    pixels[dark, :3] = rng.integers(0, 30, (int(dark.sum()), 3), dtype=np.uint8)
+    pixels[:, :4] = 0
+    img = Image.fromarray(pixels, "RGBA")
+    if mode == "P":
+        return img.convert("RGB").quantize(64)
+    return img.convert(mode)
+
+
+def _png(img, **options):
+    out = io.BytesIO()
+    img.save(out, "PNG", **options)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+@pytest.mark.parametrize("mode", MODES)
+def test_numpy_keying_matches_reference(mode, threshold):
+    src = _source(mode).convert("RGBA")
+    expected = rb.key_black_reference(src.copy(), threshold)
+    actual = rb.key_black_numpy(src.copy(), threshold)
+    assert actual.mode == "RGBA"
+    assert actual.tobytes() == expected.tobytes()
+    assert rb.encode_png(actual) == rb.encode_png(expected)
+
+
+def test_numpy_keying_keeps_metadata():
+    data = _png(_source("RGBA"), dpi=(144, 144), icc_profile=b"fake profile")
+    src = Image.open(io.BytesIO(data)).convert("RGBA")
+    expected = rb.encode_png(rb.key_black_reference(src.copy()))
+    assert rb.encode_png(rb.key_black_numpy(src.copy())) == expected
+    assert rb._key_png_bytes(data)[0] == expected
+
+
+@pytest.mark.parametrize("max_memory", [1, 37 * rb.TILED_BYTES_PER_PIXEL * 5, 2**30])
+@pytest.mark.parametrize("mode", MODES)
+def test_tiled_matches_whole_image(tmp_path, mode, max_memory):
+    data = _png(_source(mode), optimize=True)
+    whole = Image.open(io.BytesIO(rb._key_png_bytes(data)[0])).convert("RGBA")
+
+    src = tmp_path / "in.png"
+    src.write_bytes(data)
+    dst = tmp_path / "out.png"
+    assert rb.key_png_tiled(str(src), str(dst), max_memory=max_memory) == whole.width * whole.height
+    tiled = Image.open(dst).convert("RGBA")
+    assert tiled.size == whole.size
+    assert tiled.tobytes() == whole.tobytes()
+
+
+def test_tiled_keeps_icc_and_dpi(tmp_path):
+    data = _png(_source("RGBA"), dpi=(144, 144), icc_profile=b"fake profile")
+    src = tmp_path / "in.png"
+    src.write_bytes(data)
+    dst = tmp_path / "out.png"
+    rb.key_png_tiled(str(src), str(dst), max_memory=1)
+    whole = Image.open(io.BytesIO(rb._key_png_bytes(data)[0]))
+    tiled = Image.open(dst)
+    assert tiled.info["icc_profile"] == whole.info["icc_profile"]
+    assert tiled.info["dpi"] == whole.info["dpi"]
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("telethon")
+
+from fake_telegram import FakeTelegramClient
+from get_channel_members import CHANNEL_ID, CHAT_ID, TokenBucket
+from send_invite import bulk_invite, load_ledger
+
+
+async def _bulk(client, user_ids, ledger_path):
+    channel = await client.get_entity(CHANNEL_ID)
+    chat = await client.get_entity(CHAT_ID)
+    return await bulk_invite(client, channel, chat, user_ids, str(ledger_path),
+                             limiter=TokenBucket(rate=2000, burst=50))
+
+
+async def _crash_and_resume(client, user_ids, ledger_path, after_sent):
+    run = asyncio.create_task(_bulk(client, user_ids, ledger_path))
+    while len(client.sent) < after_sent:
+        await asyncio.sleep(0.001)
+    run.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await run
+    # A crash can leave half a line at the end of the ledger
+    with open(ledger_path, "a", encoding="utf-8") as f:
+        f.write('{"user_id": %d, "status": "se' % user_ids[-1])
+    return await _bulk(client, user_ids, ledger_path)
+
+
+@pytest.mark.parametrize("after_sent", [1, 25, 59])
+def test_bulk_invite_resumes_without_duplicates(tmp_path, after_sent):
+    client = FakeTelegramClient(channel_size=200, latency=0.002, rate_limit=0)
+    user_ids = sorted(client.users)[:60]
+    ledger_path = tmp_path / "ledger.jsonl"
+
+    stats = asyncio.run(_crash_and_resume(client, user_ids, ledger_path, after_sent))
+
+    assert stats["failed"] == 0
+    assert stats["skipped"] >= after_sent
+    # Two single-use links per user, no matter where the run stopped
+    assert client.invites == 2 * len(user_ids)
+    assert sorted(client.sent) == user_ids
+
+    state = load_ledger(str(ledger_path))
+    assert all(state[user_id]["status"] == "sent" for user_id in user_ids)
+    links = [state[user_id][key] for user_id in user_ids for key in ("channel_link", "chat_link")]
+    assert len(set(links)) == len(links)
+
+
+def test_bulk_invite_rerun_after_completion_sends_nothing(tmp_path):
+    client = FakeTelegramClient(channel_size=50, latency=0, rate_limit=0)
+    user_ids = sorted(client.users)[:10]
+    ledger_path = tmp_path / "ledger.jsonl"
+    asyncio.run(_bulk(client, user_ids, ledger_path))
+    stats = asyncio.run(_bulk(client, user_ids, ledger_path))
+    assert stats["skipped"] == 10 and stats["issued"] == 0 and stats["sent"] == 0
+    assert client.invites == 20 and len(client.sent) == 10
@@ -0,0 +1,160 @@
+import json
+import mmap
+
+import pytest
+
+import workflow_patch as wp
+
+
+def _workflow():
+    return {
+        "name": "Slides",
+        "nodes": [
+            {"name": "Pinned", "type": "n8n-nodes-base.set", "id": "a1",
+             "parameters": {"blob": "Ünïcødé " + "x" * 5000, "rate": 1.5e-3}},
+            {"name": "Collect URLs", "type": "n8n-nodes-base.code", "id": "b2",
+             "parameters": {"jsCode": "return [];", "options": {"retry": None}}},
+            {"name": "Fetch", "type": "n8n-nodes-base.httpRequest", "id": "c3",
+             "parameters": {"url": "https://example.com", "options": {}}},
+            {"name": "Empty", "type": "n8n-nodes-base.noOp", "id": "d4", "parameters": {}},
+            {"name": "Tail", "type": "n8n-nodes-base.noOp", "id": "e5",
+             "parameters": {"note": "after the patched nodes \"quoted\" {braces} [brackets]"}},
+        ],
+        "connections": {"Collect URLs": {"main": [[{"node": "Fetch", "type": "main", "index": 0}]]}},
+        "pinData": {"Pinned": [{"json": {"k": "v" * 3000}}]},
+    }
+
+
+LAYOUTS = {
+    "compact": {"separators": (",", ":")},
+    "indent2": {"indent": 2},
+    "indent4": {"indent": 4, "ensure_ascii": False},
+}
+
+PATCHES = [
+    # Replace an existing value
+    {"match": {"name": "Collect URLs"}, "set": {"parameters.jsCode": "return items;"}},
+    # Missing key in an existing object
+    {"match": {"name": "Fetch"}, "set": {"parameters.options.timeout": 60000}},
+    # Missing parents, and a key inside an empty object
+    {"match": {"name": "Empty"}, "set": {"parameters.options.batching.size": 5}},
+    {"match": {"type": "n8n-nodes-base.noOp"}, "set": {"notes": "checked"}},
+    # A null intermediate becomes an object
+    {"match": {"to": "Fetch"}, "set": {"parameters.options.retry.max": 3}},
+]
+
+
+def _write(tmp_path, layout, data=None):
+    src = tmp_path / f"{layout}.json"
+    src.write_text(json.dumps(data or _workflow(), **LAYOUTS[layout]), encoding="utf-8")
+    return src
+
+
+def _patch_both(tmp_path, src, patches):
+    loaded = wp.patch_file(str(src), str(tmp_path / "loaded.json"), patches)
+    streamed = wp.patch_file_streaming(str(src), str(tmp_path / "streamed.json"), patches)
+    assert loaded["error"] is None and streamed["error"] is None
+    assert streamed["patches"] == loaded["patches"]
+    return (json.loads((tmp_path / "loaded.json").read_text(encoding="utf-8")),
+            (tmp_path / "streamed.json").read_bytes())
+
+
+def _splices(src, patches):
+    """Expected (start, end, replacement) per edit, straight from the tokenizer."""
+    with open(src, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        stubs, _ = wp.scan_workflow(buf)
+        spans = {stub["name"]: stub["_span"] for stub in stubs}
+        return sorted(wp._edit_for_path(buf, spans[name][0], path, value)
+                      for name, path, value in patches)
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_streaming_matches_patch_file(tmp_path, layout):
+    src = _write(tmp_path, layout)
+    loaded, streamed = _patch_both(tmp_path, src, PATCHES)
+    assert json.loads(streamed) == loaded
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_streaming_keeps_bytes_outside_splices(tmp_path, layout):
+    src = _write(tmp_path, layout)
+    edits = [("Collect URLs", "parameters.jsCode", "return items;"),
+             ("Fetch", "parameters.options.timeout", 60000),
+             ("Empty", "parameters.options.batching.size", 5)]
+    patches = [{"match": {"name": name}, "set": {path: value}} for name, path, value in edits]
+    original = src.read_bytes()
+    expected, pos = b"", 0
+    for start, end, replacement in _splices(src, edits):
+        expected += original[pos:start] + replacement
+        pos = end
+    expected += original[pos:]
+
+    _, streamed = _patch_both(tmp_path, src, patches)
+    assert streamed == expected
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_streaming_inserts_follow_layout(tmp_path, layout):
+    # Inserted members, parents and rewritten nulls look as if the exporter wrote them
+    src = _write(tmp_path, layout)
+    loaded, streamed = _patch_both(tmp_path, src, PATCHES)
+    assert streamed.decode("utf-8") == json.dumps(loaded, **LAYOUTS[layout])
+
+
+def test_streaming_overlapping_paths_fall_back_to_node(tmp_path):
+    src = _write(tmp_path, "indent2")
+    patches = [{"match": {"name": "Collect URLs"},
+                "set": {"parameters.options": {"retry": 1}, "parameters.options.timeout": 5}}]
+    original = src.read_bytes()
+    loaded, streamed = _patch_both(tmp_path, src, patches)
+    assert json.loads(streamed) == loaded
+    assert loaded["nodes"][1]["parameters"]["options"] == {"retry": 1, "timeout": 5}
+
+    # Only the patched node is rewritten
+    with open(src, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        start, end = wp.scan_workflow(buf)[0][1]["_span"]
+    assert streamed.startswith(original[:start])
+    assert streamed.endswith(original[end:])
+
+
+def test_streaming_copies_across_block_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(wp, "_COPY_BLOCK", 7)
+    src = _write(tmp_path, "compact")
+    loaded, streamed = _patch_both(tmp_path, src, PATCHES)
+    assert json.loads(streamed) == loaded
+
+
+def test_streaming_reports_missing_nodes(tmp_path):
+    src = _write(tmp_path, "compact")
+    result = wp.patch_file_streaming(str(src), str(tmp_path / "out.json"),
+                                     [{"match": {"name": "Nope"}, "set": {"x": 1}},
+                                      {"match": {"name": "Gone"}, "set": {"x": 1}, "required": False}])
+    assert result["error"] is None
+    assert [entry["patch"] for entry in result["missing"]] == [0]
+    assert result["bytes_changed"] == 0
+    assert (tmp_path / "out.json").read_bytes() == src.read_bytes()
+
+
+@pytest.mark.parametrize("match", [{}, {"nmae": "Collect URLs"}, {"name": "Fetch", "form": "Collect URLs"}])
+def test_bad_match_is_an_error(tmp_path, match):
+    src = _write(tmp_path, "indent2")
+    for patch in (wp.patch_file, wp.patch_file_streaming):
+        dst = tmp_path / f"{patch.__name__}.json"
+        result = patch(str(src), str(dst), [{"match": match, "set": {"notes": "x"}}])
+        assert result["error"]
+        assert not dst.exists()
+
+
+def test_directory_skips_patches_and_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _write(tmp_path, "indent2")
+    (tmp_path / "sub").mkdir()
+    _write(tmp_path / "sub", "compact")
+    (tmp_path / "patches.json").write_text(json.dumps(PATCHES[:1]), encoding="utf-8")
+
+    for _ in range(2):
+        # The rerun must not pick up fixed/*.json from the first run
+        assert wp.main(["patches.json", ".", "--out", "fixed"]) == 0
+    assert sorted(p.relative_to(tmp_path / "fixed").as_posix()
+                  for p in (tmp_path / "fixed").rglob("*.json")) == ["indent2.json", "sub/compact.json"]
+    assert wp.collect_workflows(["patches.json"], exclude=["patches.json"]) == ["patches.json"]
@@ -0,0 +1,370 @@
+"""Offline cost analysis for exported n8n workflows.
+
+Reads the `connections` graph and node parameters and reports, without
+running anything:
+
+  - which nodes run once per item (e.g. per slide after Split Slides) and how
+    many HTTP calls one execution makes at most for a given item count; IF and
+    Switch outputs are alternatives, so only the costliest branch is counted
+  - the critical path (longest chain of nodes / HTTP hops)
+  - links where a node does not read its predecessor's output, so the
+    predecessor could run on a parallel branch, and per-item HTTP nodes
+    that could be batched
+  - O(n^2) item lookups in code nodes ($('X').all() / .find() inside loops)
+
+Usage:
+    python workflow_analyze.py workflow_working.json [--items 7] [--json]
+"""
+import argparse
+import itertools
+import json
+import math
+import re
+import sys
+
+from workflow_patch import WorkflowIndex
+
+HTTP_TYPES = {'n8n-nodes-base.httpRequest'}
+CODE_TYPES = {'n8n-nodes-base.code', 'n8n-nodes-base.function'}
+BRANCH_TYPES = {'n8n-nodes-base.if', 'n8n-nodes-base.switch'}
+# Beyond this many output combinations branches are treated as all running
+MAX_RUN_SETS = 4096
+TRIGGER_SUFFIXES = ('Trigger', '.webhook', '.manualTrigger', '.cron', '.scheduleTrigger')
+
+_NODE_REF = re.compile(r"""\$\(\s*(['"])(.+?)\1\s*\)""")
+_CURRENT_ITEM = re.compile(r'\$json\b|\$input\b|\bitems\b|\$item\b')
+_LOOP = re.compile(r'\b(?:for|while)\s*\(|\.(?:map|forEach|filter|reduce|some|every|flatMap)\s*\(')
+_LOOKUP = re.compile(
+    r"""\$\(\s*(['"]).+?\1\s*\)\.all\(\)|\$input\.all\(\)|"""
+    r"""\.(?:find|findIndex|filter|indexOf|includes|some)\s*\("""
+)
+_RETURNS_LIST = re.compile(r'return\s*\[|return\s+[^;]*\.(?:map|filter|flatMap)\s*\(')
+_RETURN_NAME = re.compile(r'return\s+(\w+)\s*;?\s*$', re.M)
+
+
+def _matching(code, open_at, open_char, close_char):
+    """Index of the bracket closing the one at open_at (string contents are not special-cased)."""
+    depth = 0
+    for i in range(open_at, len(code)):
+        if code[i] == open_char:
+            depth += 1
+        elif code[i] == close_char:
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(code)
+
+
+def _loop_bodies(code):
+    """(start, end) spans of loop bodies and iteration callbacks."""
+    spans = []
+    for m in _LOOP.finditer(code):
+        paren = m.end() - 1
+        close = _matching(code, paren, '(', ')')
+        if m.group().startswith('.'):
+            # Callback: the whole argument list is the body
+            spans.append((paren, close))
+            continue
+        i = close + 1
+        while i < len(code) and code[i].isspace():
+            i += 1
+        if i < len(code) and code[i] == '{':
+            spans.append((i, _matching(code, i, '{', '}')))
+        else:
+            end = code.find(';', i)
+            spans.append((i, end if end != -1 else len(code)))
+    return spans
+
+
+def node_text(node):
+    """All expression/code text of a node, for reference scanning."""
+    return json.dumps(node.get('parameters', {}), ensure_ascii=False)
+
+
+def code_of(node):
+    params = node.get('parameters', {})
+    return params.get('jsCode') or params.get('functionCode') or ''
+
+
+def per_item_mode(node):
+    return node.get('parameters', {}).get('mode') == 'runOnceForEachItem'
+
+
+def returns_list(code):
+    """Heuristic: does an all-items code node emit one item per element of a list?"""
+    if _RETURNS_LIST.search(code):
+        return True
+    for m in _RETURN_NAME.finditer(code):
+        if re.search(rf'\b{re.escape(m.group(1))}\.push\(', code):
+            return True
+    return False
+
+
+def quadratic_lookups(node):
+    """(line, snippet, reason) for item lookups that run once per item."""
+    code = code_of(node)
+    findings = []
+    if per_item_mode(node):
+        for m in _LOOKUP.finditer(code):
+            if m.group().endswith('.all()'):
+                line = code.count('\n', 0, m.start()) + 1
+                findings.append((line, m.group(), 'runs once per item in runOnceForEachItem mode'))
+    for start, end in _loop_bodies(code):
+        for m in _LOOKUP.finditer(code, start, end):
+            line = code.count('\n', 0, m.start()) + 1
+            findings.append((line, m.group().rstrip('('), 'inside a loop over items'))
+    return sorted(set(findings))
+
+
+def data_dependencies(node, predecessors):
+    """Predecessors whose output this node actually reads."""
+    text = code_of(node) if node.get('type') in CODE_TYPES else node_text(node)
+    referenced = {m.group(2) for m in _NODE_REF.finditer(text)}
+    reads_input = bool(_CURRENT_ITEM.search(text))
+    return {p for p in predecessors if p in referenced or reads_input}
+
+
+def is_trigger(node):
+    return node.get('type', '').endswith(TRIGGER_SUFFIXES)
+
+
+def branch_outputs(data, index):
+    """IF/Switch nodes -> one set of target names per output.
+
+    Each item leaves through exactly one output, so the outputs are
+    alternatives. A Switch set to send items to all matching outputs is not
+    exclusive and is left out.
+    """
+    branches = {}
+    for source, outputs in data.get('connections', {}).items():
+        node = index.by_name.get(source)
+        if not node or node.get('type') not in BRANCH_TYPES:
+            continue
+        if node.get('parameters', {}).get('options', {}).get('allMatchingOutputs'):
+            continue
+        branches[source] = [{link['node'] for link in branch or []} for branch in outputs.get('main', [])]
+    return {name: outputs for name, outputs in branches.items() if len(outputs) > 1}
+
+
+def run_sets(index, branches):
+    """Sets of nodes that can run together for one item, one per choice of branch outputs."""
+    roots = [name for name in index.by_name if not index.incoming.get(name)] or list(index.by_name)
+    names = sorted(branches)
+    if math.prod(len(branches[name]) for name in names) > MAX_RUN_SETS:
+        names = []
+    result = set()
+    for choice in itertools.product(*(range(len(branches[name])) for name in names)):
+        chosen = dict(zip(names, choice))
+        seen = set()
+        stack = list(roots)
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            if name in chosen:
+                stack.extend(branches[name][chosen[name]])
+            else:
+                stack.extend(index.outgoing.get(name, ()))
+        result.add(frozenset(seen))
+    return result
+
+
+def analyze(data, items=None):
+    index = WorkflowIndex(data)
+    nodes = index.by_name
+    order = topological_order(index)
+
+    # Multiplicity: '1' or 'N' items flowing out of each node
+    multiplicity = {}
+    fan_out = []
+    for name in order:
+        node = nodes[name]
+        preds = index.incoming.get(name, ())
+        incoming = 'N' if any(multiplicity.get(p) == 'N' for p in preds) else '1'
+        if node.get('type') in CODE_TYPES and not per_item_mode(node):
+            out = 'N' if returns_list(code_of(node)) else '1'
+            if out == 'N' and incoming == '1':
+                fan_out.append(name)
+        else:
+            out = incoming
+        multiplicity[name] = out
+
+    def runs(name):
+        """How many times the node executes: per item for non-code nodes and per-item code."""
+        node = nodes[name]
+        preds = index.incoming.get(name, ())
+        per_item_input = any(multiplicity.get(p) == 'N' for p in preds)
+        if node.get('type') in CODE_TYPES and not per_item_mode(node):
+            return '1'
+        return 'N' if per_item_input else '1'
+
+    http = [n for n in order if nodes[n].get('type') in HTTP_TYPES]
+    http_fixed = [n for n in http if runs(n) == '1']
+    http_per_item = [n for n in http if runs(n) == 'N']
+
+    # Exclusive branches: count only the costliest combination of outputs
+    branches = branch_outputs(data, index)
+    together = run_sets(index, branches)
+    fixed_max = max(len(s.intersection(http_fixed)) for s in together)
+    per_item_max = max(len(s.intersection(http_per_item)) for s in together)
+
+    # Longest path by node count and by HTTP hops
+    depth = {}
+    http_depth = {}
+    parent = {}
+    for name in order:
+        best = max(index.incoming.get(name, ()), key=lambda p: (http_depth[p], depth[p]), default=None)
+        parent[name] = best
+        is_http = 1 if name in http else 0
+        depth[name] = (depth[best] if best else 0) + 1
+        http_depth[name] = (http_depth[best] if best else 0) + is_http
+    end = max(order, key=lambda n: (http_depth[n], depth[n]), default=None)
+    critical = []
+    while end:
+        critical.append(end)
+        end = parent[end]
+    critical.reverse()
+
+    # Links where the successor never reads the predecessor's output
+    decoupled = []
+    for name in order:
+        preds = index.incoming.get(name, set())
+        if not preds or is_trigger(nodes[name]):
+            continue
+        unused = sorted(set(preds) - data_dependencies(nodes[name], preds))
+        for p in unused:
+            decoupled.append({'node': name, 'does_not_read': p})
+
+    # Nodes with no path between them can run concurrently, unless they sit
+    # on alternative outputs of an IF/Switch
+    reach = {name: _reachable(index, name) for name in order}
+    independent = [
+        (a, b) for i, a in enumerate(order) for b in order[i + 1:]
+        if b not in reach[a] and a not in reach[b]
+        and not is_trigger(nodes[a]) and not is_trigger(nodes[b])
+        and any(a in s and b in s for s in together)
+    ]
+
+    batchable = []
+    for name in http_per_item:
+        batching = nodes[name].get('parameters', {}).get('options', {}).get('batching')
+        if not batching:
+            batchable.append(name)
+
+    lookups = {
+        name: [{'line': line, 'code': snippet, 'reason': reason}
+               for line, snippet, reason in quadratic_lookups(nodes[name])]
+        for name in order if nodes[name].get('type') in CODE_TYPES
+    }
+    lookups = {k: v for k, v in lookups.items() if v}
+
+    report = {
+        'name': data.get('name'),
+        'nodes': len(order),
+        'fan_out': fan_out,
+        'per_item_nodes': [n for n in order if runs(n) == 'N'],
+        'branches': {name: [sorted(targets) for targets in outputs] for name, outputs in branches.items()},
+        'http_calls': {
+            'fixed': http_fixed,
+            'per_item': http_per_item,
+            'fixed_max': fixed_max,
+            'per_item_max': per_item_max,
+            'formula': f'{fixed_max} + {per_item_max}*N',
+        },
+        'critical_path': {
+            'nodes': critical,
+            'depth': len(critical),
+            'http_hops': sum(1 for n in critical if n in http),
+        },
+        'decoupled_links': decoupled,
+        'parallel_candidates': [list(pair) for pair in independent],
+        'batchable_http': batchable,
+        'quadratic_lookups': lookups,
+    }
+    if items is not None:
+        report['http_calls']['total'] = fixed_max + per_item_max * items
+        report['http_calls']['items'] = items
+    return report
+
+
+def topological_order(index):
+    """Kahn's algorithm over node names; nodes in cycles are appended at the end."""
+    pending = {name: len(index.incoming.get(name, ())) for name in index.by_name}
+    ready = [node['name'] for node in index.nodes if pending[node['name']] == 0]
+    order = []
+    while ready:
+        name = ready.pop(0)
+        order.append(name)
+        for target in sorted(index.outgoing.get(name, ())):
+            if target in pending:
+                pending[target] -= 1
+                if pending[target] == 0:
+                    ready.append(target)
+    order.extend(name for name in index.by_name if name not in order)
+    return order
+
+
+def _reachable(index, start):
+    seen = set()
+    stack = list(index.outgoing.get(start, ()))
+    while stack:
+        name = stack.pop()
+        if name not in seen:
+            seen.add(name)
+            stack.extend(index.outgoing.get(name, ()))
+    return seen
+
+
+def print_report(report):
+    print(f"Workflow: {report['name']} ({report['nodes']} nodes)")
+    print(f"Fan-out points: {', '.join(report['fan_out']) or 'none'}")
+    for name, outputs in report['branches'].items():
+        print(f"Exclusive outputs of {name}: {' | '.join(', '.join(t) or '-' for t in outputs)}")
+    calls = report['http_calls']
+    print(f"HTTP calls per execution (at most): {calls['formula']}", end='')
+    if 'total' in calls:
+        print(f" = {calls['total']} for N={calls['items']}", end='')
+    print()
+    print(f"  once: {', '.join(calls['fixed']) or '-'}")
+    print(f"  per item: {', '.join(calls['per_item']) or '-'}")
+    path = report['critical_path']
+    print(f"Critical path ({path['depth']} nodes, {path['http_hops']} HTTP hops):")
+    print('  ' + ' -> '.join(path['nodes']))
+    if report['decoupled_links']:
+        print('Links where the node ignores its predecessor (predecessor could run in parallel):')
+        for link in report['decoupled_links']:
+            print(f"  {link['does_not_read']} -> {link['node']}")
+    if report['parallel_candidates']:
+        print('Independent nodes (may run concurrently):')
+        for a, b in report['parallel_candidates']:
+            print(f"  {a} || {b}")
+    if report['batchable_http']:
+        print('Per-item HTTP nodes without batching (items run sequentially):')
+        for name in report['batchable_http']:
+            print(f"  {name}")
+    if report['quadratic_lookups']:
+        print('O(n^2) item lookups:')
+        for name, findings in report['quadratic_lookups'].items():
+            for f in findings:
+                print(f"  {name}:{f['line']}: {f['code']} ({f['reason']})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Static cost analysis of an n8n workflow export.')
+    parser.add_argument('workflow')
+    parser.add_argument('--items', type=int, default=None, help='items after fan-out (e.g. slides)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    with open(args.workflow, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    report = analyze(data, args.items)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,445 @@
+"""Declarative patches for exported n8n workflows.
+
+A patch picks nodes by name/type/id (and optionally by a connection to
+another node) and sets values at dotted paths inside them:
+
+    [
+      {"match": {"name": "Collect URLs"}, "set": {"parameters.jsCode": "..."}},
+      {"match": {"type": "n8n-nodes-base.httpRequest", "from": "Split Slides"},
+       "set": {"parameters.options.timeout": 60000}, "required": false}
+    ]
+
+Usage:
+    python workflow_patch.py patches.json workflow.json [more.json | dir ...] --out fixed/
+
+--stream leaves every byte outside the patched values untouched, so large
+exports are patched in bounded memory and the result diffs cleanly.
+"""
+import argparse
+import glob
+import json
+import mmap
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Top-level keys accepted by the n8n workflow update API
+API_KEYS = ['name', 'nodes', 'connections', 'settings']
+# Keys a patch may match nodes on
+MATCH_KEYS = ('name', 'id', 'type', 'from', 'to')
+
+
+class WorkflowIndex:
+    """Name/type/id lookups and connection adjacency over a workflow, built once."""
+
+    def __init__(self, data):
+        self.nodes = data.get('nodes', [])
+        self.by_name = {}
+        self.by_id = {}
+        self.by_type = {}
+        for node in self.nodes:
+            self.by_name[node['name']] = node
+            if 'id' in node:
+                self.by_id[node['id']] = node
+            self.by_type.setdefault(node.get('type'), []).append(node)
+
+        # source name -> target names and the reverse, across all outputs
+        self.outgoing = {}
+        self.incoming = {}
+        for source, outputs in data.get('connections', {}).items():
+            for branches in outputs.values():
+                for branch in branches:
+                    for link in branch or []:
+                        self.outgoing.setdefault(source, set()).add(link['node'])
+                        self.incoming.setdefault(link['node'], set()).add(source)
+
+    def find(self, match):
+        """Nodes satisfying every key of match (name, id, type, from, to).
+
+        An empty match or an unknown key (a typo like "nmae") raises ValueError
+        rather than selecting every node.
+        """
+        if not match:
+            raise ValueError('empty match would select every node')
+        unknown = sorted(set(match) - set(MATCH_KEYS))
+        if unknown:
+            raise ValueError(f"unknown match keys {unknown}; expected {', '.join(MATCH_KEYS)}")
+        if 'name' in match:
+            node = self.by_name.get(match['name'])
+            candidates = [node] if node else []
+        elif 'id' in match:
+            node = self.by_id.get(match['id'])
+            candidates = [node] if node else []
+        elif 'type' in match:
+            candidates = self.by_type.get(match['type'], [])
+        else:
+            candidates = self.nodes
+
+        return [
+            node for node in candidates
+            if all(node.get(key) == match[key] for key in ('name', 'id', 'type') if key in match)
+            and ('from' not in match or match['from'] in self.incoming.get(node['name'], ()))
+            and ('to' not in match or match['to'] in self.outgoing.get(node['name'], ()))
+        ]
+
+
+def set_path(obj, path, value):
+    """Set obj['a']['b'] for path 'a.b', creating intermediate dicts.
+
+    A missing or non-object intermediate (null, a string, a list) is replaced
+    with a dict, as the streaming mode does.
+    """
+    keys = path.split('.')
+    for key in keys[:-1]:
+        if not isinstance(obj.get(key), dict):
+            obj[key] = {}
+        obj = obj[key]
+    obj[keys[-1]] = value
+
+
+def apply_patches(data, patches, index=None):
+    """Apply patches to a loaded workflow in place.
+
+    Returns one report entry per patch: {"patch": i, "nodes": [matched names]}.
+    """
+    index = index or WorkflowIndex(data)
+    report = []
+    for i, patch in enumerate(patches):
+        matched = index.find(patch['match'])
+        for node in matched:
+            for path, value in patch.get('set', {}).items():
+                set_path(node, path, value)
+        report.append({'patch': i, 'match': patch['match'], 'nodes': [n['name'] for n in matched]})
+    return report
+
+
+def patch_file(src, dst, patches, keep_keys=None):
+    """Load src, apply patches, write dst. Returns a report dict (never raises)."""
+    try:
+        with open(src, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        report = apply_patches(data, patches)
+        if keep_keys:
+            data = {k: v for k, v in data.items() if k in keep_keys}
+        with open(dst, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        missing = [r for r, p in zip(report, patches) if not r['nodes'] and p.get('required', True)]
+        return {'src': src, 'dst': dst, 'patches': report, 'missing': missing, 'error': None}
+    except Exception as e:
+        return {'src': src, 'dst': dst, 'patches': [], 'missing': [], 'error': str(e)}
+
+
+# --- Streaming mode -------------------------------------------------------
+#
+# Exports can embed megabytes of base64 and pinned data. The streaming mode
+# scans the file through mmap, decodes only node name/type/id and the values
+# being replaced, and copies every other byte through unchanged.
+
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_STRUCTURAL = re.compile(rb'["{}\[\]]')
+_SCALAR = re.compile(rb'[^,\]}\s]+')
+_WS = re.compile(rb'\s*')
+# Unchanged bytes are copied in blocks of this size, never as one slice
+_COPY_BLOCK = 1 << 20
+
+
+def _skip_ws(buf, i):
+    return _WS.match(buf, i).end()
+
+
+def _value_end(buf, i):
+    """Offset just past the JSON value that starts at i."""
+    c = buf[i:i + 1]
+    if c == b'"':
+        return _STRING.match(buf, i).end()
+    if c not in (b'{', b'['):
+        return _SCALAR.match(buf, i).end()
+    depth = 0
+    pos = i
+    while True:
+        m = _STRUCTURAL.search(buf, pos)
+        if m is None:
+            raise ValueError(f'unterminated value at byte {i}')
+        token = m.group()
+        if token == b'"':
+            pos = _STRING.match(buf, m.start()).end()
+            continue
+        depth += 1 if token in (b'{', b'[') else -1
+        pos = m.end()
+        if depth == 0:
+            return pos
+
+
+def _iter_members(buf, start):
+    """Yield (key, key_start, value_start, value_end) for the object opening at start."""
+    i = _skip_ws(buf, start + 1)
+    if buf[i:i + 1] == b'}':
+        return
+    while True:
+        key_end = _STRING.match(buf, i).end()
+        key = json.loads(buf[i:key_end])
+        value_start = _skip_ws(buf, _skip_ws(buf, key_end) + 1)
+        value_end = _value_end(buf, value_start)
+        yield key, i, value_start, value_end
+        i = _skip_ws(buf, value_end)
+        if buf[i:i + 1] == b'}':
+            return
+        i = _skip_ws(buf, i + 1)
+
+
+def _iter_elements(buf, start):
+    """Yield (value_start, value_end) for the array opening at start."""
+    i = _skip_ws(buf, start + 1)
+    if buf[i:i + 1] == b']':
+        return
+    while True:
+        end = _value_end(buf, i)
+        yield i, end
+        i = _skip_ws(buf, end)
+        if buf[i:i + 1] == b']':
+            return
+        i = _skip_ws(buf, i + 1)
+
+
+def _member_style(buf, start):
+    """(newline + indent before members, separator after keys) of an object, as written."""
+    first = _skip_ws(buf, start + 1)
+    gap = bytes(buf[start + 1:first]).decode()
+    members = _iter_members(buf, start)
+    member = next(members, None)
+    if member is None:
+        return '', ': '
+    key_end = _STRING.match(buf, member[1]).end()
+    return gap, bytes(buf[key_end:member[2]]).decode()
+
+
+def _copy_range(out, buf, start, end):
+    """Write buf[start:end] to out one block at a time."""
+    for block in range(start, end, _COPY_BLOCK):
+        out.write(buf[block:min(block + _COPY_BLOCK, end)])
+
+
+def _line_indent(buf, i):
+    line_start = buf.rfind(b'\n', 0, i) + 1
+    return _WS.match(buf, line_start).end() - line_start
+
+
+def _dumps_like(buf, obj_start, value, column=None):
+    """Serialize value in the layout of the object at obj_start.
+
+    column is where the value's closing line should be indented (defaults to
+    the object's own members); compact objects get compact output.
+    """
+    gap, sep = _member_style(buf, obj_start)
+    if '\n' not in gap:
+        return json.dumps(value, ensure_ascii=False, separators=(',' if sep == ':' else ', ', sep)).encode()
+    members = len(gap.rsplit('\n', 1)[1])
+    unit = max(1, members - _line_indent(buf, obj_start))
+    column = members if column is None else column
+    text = json.dumps(value, ensure_ascii=False, indent=unit, separators=(',', sep))
+    return text.replace('\n', '\n' + ' ' * column).encode()
+
+
+def _edit_for_path(buf, node_start, path, value):
+    """(start, end, replacement bytes) setting path inside the node object."""
+    keys = path.split('.')
+    obj_start = node_start
+    for depth, key in enumerate(keys):
+        if buf[obj_start:obj_start + 1] != b'{':
+            # Replacing a non-object with an object: rewrite it whole, in the node's layout
+            nested = value
+            for k in reversed(keys[depth:]):
+                nested = {k: nested}
+            end = _value_end(buf, obj_start)
+            return obj_start, end, _dumps_like(buf, node_start, nested, _line_indent(buf, obj_start))
+        found = None
+        last_end = None
+        for name, _, value_start, value_end in _iter_members(buf, obj_start):
+            last_end = value_end
+            if name == key:
+                found = (value_start, value_end)
+        if found is None:
+            # Insert the missing member (and any missing parents) at the end of this object
+            nested = value
+            for k in reversed(keys[depth + 1:]):
+                nested = {k: nested}
+            if last_end is None:
+                # An empty object has no layout of its own: rewrite it in the node's
+                end = _value_end(buf, obj_start)
+                return obj_start, end, _dumps_like(buf, node_start, {key: nested}, _line_indent(buf, obj_start))
+            gap, sep = _member_style(buf, obj_start)
+            member = (json.dumps(key, ensure_ascii=False) + sep).encode() + _dumps_like(buf, obj_start, nested)
+            return last_end, last_end, f',{gap}'.encode() + member
+        if depth == len(keys) - 1:
+            return found[0], found[1], _dumps_like(buf, obj_start, value)
+        obj_start = found[0]
+
+
+def scan_workflow(buf):
+    """Node stubs (name/type/id plus byte span) and connections, without loading the rest."""
+    top = _skip_ws(buf, 0)
+    nodes = []
+    connections = None
+    for key, _, value_start, value_end in _iter_members(buf, top):
+        if key == 'nodes':
+            for node_start, node_end in _iter_elements(buf, value_start):
+                stub = {'_span': (node_start, node_end)}
+                for name, _, v_start, v_end in _iter_members(buf, node_start):
+                    if name in ('name', 'type', 'id'):
+                        stub[name] = json.loads(buf[v_start:v_end])
+                nodes.append(stub)
+        elif key == 'connections':
+            connections = (value_start, value_end)
+    return nodes, connections
+
+
+def patch_file_streaming(src, dst, patches):
+    """Apply patches by splicing only the changed values; all other bytes are copied as-is.
+
+    Same report shape as patch_file, plus 'bytes_changed'. Top-level keys are
+    never dropped in this mode.
+    """
+    try:
+        with open(src, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            stubs, connections_span = scan_workflow(buf)
+            data = {'nodes': stubs}
+            if connections_span and any('from' in p['match'] or 'to' in p['match'] for p in patches):
+                data['connections'] = json.loads(buf[connections_span[0]:connections_span[1]])
+
+            # Later patches win when two set the same value
+            edits_by_node = {}
+            report = []
+            index = WorkflowIndex(data)
+            for i, patch in enumerate(patches):
+                matched = index.find(patch['match'])
+                for stub in matched:
+                    edits = edits_by_node.setdefault(stub['_span'], {})
+                    edits.update(patch.get('set', {}))
+                report.append({'patch': i, 'match': patch['match'], 'nodes': [n['name'] for n in matched]})
+
+            splices = []
+            for (node_start, node_end), values in edits_by_node.items():
+                node_splices = [_edit_for_path(buf, node_start, path, value) for path, value in values.items()]
+                node_splices.sort()
+                overlapping = any(a[1] > b[0] or (a[0] == b[0] and a[1] == b[1])
+                                  for a, b in zip(node_splices, node_splices[1:]))
+                if overlapping:
+                    # Nested paths in one node: materialize just this node
+                    node = json.loads(buf[node_start:node_end])
+                    for path, value in values.items():
+                        set_path(node, path, value)
+                    replacement = _dumps_like(buf, node_start, node, _line_indent(buf, node_start))
+                    node_splices = [(node_start, node_end, replacement)]
+                splices.extend(node_splices)
+            splices.sort()
+
+            tmp = dst + '.tmp'
+            changed = 0
+            with open(tmp, 'wb') as out:
+                pos = 0
+                for start, end, replacement in splices:
+                    _copy_range(out, buf, pos, start)
+                    out.write(replacement)
+                    changed += max(end - start, len(replacement))
+                    pos = end
+                _copy_range(out, buf, pos, len(buf))
+        os.replace(tmp, dst)
+        missing = [r for r, p in zip(report, patches) if not r['nodes'] and p.get('required', True)]
+        return {'src': src, 'dst': dst, 'patches': report, 'missing': missing, 'error': None,
+                'bytes_changed': changed}
+    except Exception as e:
+        return {'src': src, 'dst': dst, 'patches': [], 'missing': [], 'error': str(e)}
+
+
+def collect_workflows(paths, exclude=()):
+    """Workflow files from file and directory arguments.
+
+    Directories are searched for *.json, skipping the files and directories in
+    exclude (the patches file and the output directory); files named
+    explicitly are always kept.
+    """
+    skip = [os.path.abspath(path) for path in exclude]
+
+    def skipped(path):
+        path = os.path.abspath(path)
+        return any(path == s or path.startswith(s + os.sep) for s in skip)
+
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            found.update(p for p in glob.glob(os.path.join(path, '**', '*.json'), recursive=True)
+                         if not skipped(p))
+        else:
+            found.add(path)
+    # './a/x.json' and 'a/x.json' are one file
+    return sorted({os.path.normpath(path) for path in found})
+
+
+def output_paths(files, out_dir):
+    """Destination per file: its path relative to the inputs' common directory, under out_dir.
+
+    Files with the same name in different subdirectories stay apart.
+    """
+    if not files:
+        return []
+    absolute = [os.path.abspath(src) for src in files]
+    common = os.path.commonpath([os.path.dirname(path) for path in absolute])
+    return [os.path.join(out_dir, os.path.relpath(path, common)) for path in absolute]
+
+
+def patch_many(files, patches, out_dir, keep_keys=None, workers=None, stream=False):
+    """Patch every file concurrently, writing results under out_dir with the same relative paths."""
+    jobs = list(zip(files, output_paths(files, out_dir)))
+    for _, dst in jobs:
+        os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+    if stream:
+        func, extra = patch_file_streaming, ()
+    else:
+        func, extra = patch_file, (keep_keys,)
+    if len(jobs) <= 1 or workers == 1:
+        return [func(src, dst, patches, *extra) for src, dst in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(func, src, dst, patches, *extra) for src, dst in jobs]
+        return [future.result() for future in futures]
+
+
+def print_report(results):
+    for result in results:
+        if result['error']:
+            print(f"Error: {result['src']}: {result['error']}")
+            continue
+        changed = f" ({result['bytes_changed']} bytes changed)" if 'bytes_changed' in result else ''
+        print(f"{result['src']} -> {result['dst']}{changed}")
+        for entry in result['patches']:
+            where = ', '.join(entry['nodes']) or 'NOT FOUND'
+            print(f"  #{entry['patch']} {json.dumps(entry['match'], ensure_ascii=False)}: {where}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply declarative patches to n8n workflow exports.')
+    parser.add_argument('patches', help='JSON file with a list of patches')
+    parser.add_argument('workflows', nargs='+', help='workflow files or directories')
+    parser.add_argument('--out', required=True, help='output directory')
+    parser.add_argument('--api-keys', action='store_true', help=f'keep only {API_KEYS}')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--stream', action='store_true',
+                        help='splice changed values into the original bytes instead of re-serializing')
+    args = parser.parse_args(argv)
+    if args.stream and args.api_keys:
+        parser.error('--stream keeps the file as-is and cannot drop top-level keys')
+
+    with open(args.patches, 'r', encoding='utf-8') as f:
+        patches = json.load(f)
+    files = collect_workflows(args.workflows, exclude=[args.patches, args.out])
+    results = patch_many(files, patches, args.out, API_KEYS if args.api_keys else None, args.workers,
+                         args.stream)
+    print_report(results)
+
+    failed = [r for r in results if r['error'] or r['missing']]
+    print(f"Done: {len(results) - len(failed)}/{len(results)} workflows fully patched.")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())